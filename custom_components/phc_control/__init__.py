@@ -1,18 +1,45 @@
 """Platform for switch integration."""
 from __future__ import annotations
 from typing import Any
+import asyncio
+import logging
+import time
 
-from homeassistant.const import *
-from homeassistant.core import HomeAssistant, ServiceCall
+from homeassistant.const import (
+    ATTR_ENTITY_ID,
+    CONF_ADDRESS,
+    CONF_HOST,
+    EVENT_HOMEASSISTANT_STOP,
+    Platform,
+)
+from homeassistant.core import Event, HomeAssistant, ServiceCall, callback
 from homeassistant.config_entries import SOURCE_REAUTH, ConfigEntry
 from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import ConfigEntryNotReady
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.event import async_call_later, async_track_time_interval
 
 import homeassistant.helpers.config_validation as cv
 import voluptuous as vol
 
-from .const import *
-from .coordinator import PHCUpdateCoordinator as Coordinator
-from .phcgateway import PHCGateway
+from .const import (
+    ATTR_CYCLES,
+    ATTR_MODULE_TYPE,
+    ATTR_SECONDS,
+    CAPABILITY_RECHECK_INTERVAL,
+    CONF_CAPABILITIES,
+    DOMAIN,
+    MODULE_TYPE_OUTPUT,
+    MODULE_TYPE_SHUTTER,
+    PLATFORMS,
+    SERVICE_PROFILE,
+    SERVICE_RECORD,
+    SERVICE_REFRESH,
+)
+from .coordinator import COORDINATORS, PHCUpdateCoordinator as Coordinator
+from .stm.phcgateway import PHCGateway, RequestError
+
+_LOGGER = logging.getLogger(__name__)
 
 CONFIG_SCHEMA = vol.Schema(
     {
@@ -34,13 +61,35 @@ async def async_setup(hass: HomeAssistant, config: dict[str, Any]):
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up Homewizard Capacity from a config entry."""
-    gateway = PHCGateway(entry.data[CONF_HOST])
-    coordinator = Coordinator(hass, entry, gateway)
+    gateway = PHCGateway(
+        entry.data[CONF_HOST], capabilities=entry.data.get(CONF_CAPABILITIES)
+    )
+    coordinators: dict[str, Coordinator] = {
+        coordinator_class.module_type: coordinator_class(hass, entry, gateway)
+        for coordinator_class in COORDINATORS
+    }
+    # Shutter modules live in the output address range, read them in one batch
+    coordinators[MODULE_TYPE_OUTPUT].companion = coordinators[MODULE_TYPE_SHUTTER]
 
-    await coordinator.async_config_entry_first_refresh()
+    # The project is downloaded once and shared, so load it before the
+    # coordinators start polling in parallel.
+    try:
+        await hass.async_add_executor_job(gateway.get_output_modules)
+    except RequestError as err:
+        raise ConfigEntryNotReady(f"Unable to load the PHC modules: {err}") from err
+    await asyncio.gather(
+        *(coordinator.async_load_usage() for coordinator in coordinators.values())
+    )
+    await asyncio.gather(
+        *(_async_first_refresh(coordinator) for coordinator in coordinators.values())
+    )
+    # One dead module class must not keep the others from loading, but
+    # without any answering module the STM is not ready.
+    if not any(coordinator.data for coordinator in coordinators.values()):
+        raise ConfigEntryNotReady(f"No PHC module at {gateway.host} answered")
 
     hass.data.setdefault(DOMAIN, {})
-    hass.data[DOMAIN][str(entry.entry_id) + "_coordinator"] = coordinator
+    hass.data[DOMAIN][str(entry.entry_id) + "_coordinators"] = coordinators
     hass.data[DOMAIN][str(entry.entry_id) + "_gateway"] = gateway
 
     # Abort reauth config flow if active
@@ -51,25 +100,228 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         ):
             hass.config_entries.flow.async_abort(progress_flow["flow_id"])
 
+    await _async_migrate_dimmer_unique_ids(hass, entry, gateway)
+
     # Finalize
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
-    _async_register_services(hass, coordinator)
+    _async_register_services(hass, coordinators, gateway)
+
+    async def async_recheck_capabilities(_now) -> None:
+        """Re-probe the STM and store changed capabilities in the entry."""
+        try:
+            capabilities = await hass.async_add_executor_job(
+                gateway.probe_capabilities
+            )
+        except RequestError as err:
+            _LOGGER.debug("Capability re-check failed: %s", err)
+            return
+
+        if capabilities != entry.data.get(CONF_CAPABILITIES):
+            hass.config_entries.async_update_entry(
+                entry, data={**entry.data, CONF_CAPABILITIES: capabilities}
+            )
+            gateway.apply_capabilities(capabilities)
+
+    @callback
+    def async_save_usage_on_stop(_event: Event) -> None:
+        """Have the store write the usage statistics before shutting down.
+
+        Channels that stay on accumulate on time without a state change, so
+        the totals are written at shutdown even when no save is pending.
+        """
+        for coordinator in coordinators.values():
+            coordinator.async_schedule_usage_save()
+
+    entry.async_on_unload(
+        hass.bus.async_listen(EVENT_HOMEASSISTANT_STOP, async_save_usage_on_stop)
+    )
+
+    if CONF_CAPABILITIES not in entry.data:
+        hass.async_create_task(async_recheck_capabilities(None))
+    entry.async_on_unload(
+        async_track_time_interval(
+            hass, async_recheck_capabilities, CAPABILITY_RECHECK_INTERVAL
+        )
+    )
     return True
 
 
+async def _async_migrate_dimmer_unique_ids(
+    hass: HomeAssistant, entry: ConfigEntry, gateway: PHCGateway
+) -> None:
+    """Move dimmer lights registered as "address channel" to their own id.
+
+    Dimmer lights used the unique id of the output light with the same
+    address and channel. Where both exist the output light was added first
+    and owns the old id, so only dimmer channels without an output twin are
+    moved.
+    """
+
+    def channels(modules: list) -> set[tuple[int, int]]:
+        return {
+            (module.address, channel)
+            for module in modules
+            for channel in module.channels
+        }
+
+    output_channels = channels(
+        await hass.async_add_executor_job(gateway.get_output_modules)
+    )
+    dimmer_channels = channels(
+        await hass.async_add_executor_job(gateway.get_dimmer_modules)
+    )
+
+    @callback
+    def async_migrate(entity_entry: er.RegistryEntry) -> dict[str, Any] | None:
+        if entity_entry.domain != Platform.LIGHT:
+            return None
+        try:
+            address, channel = (int(part) for part in entity_entry.unique_id.split())
+        except ValueError:
+            return None
+        if (address, channel) not in dimmer_channels - output_channels:
+            return None
+        return {"new_unique_id": f"dimmer {address} {channel}"}
+
+    await er.async_migrate_entries(hass, entry.entry_id, async_migrate)
+
+
+async def _async_first_refresh(coordinator: Coordinator) -> None:
+    """Refresh a coordinator, leaving its entities unavailable on failure."""
+    try:
+        await coordinator.async_config_entry_first_refresh()
+    except ConfigEntryNotReady as err:
+        _LOGGER.warning(
+            "PHC %s modules are not available yet: %s", coordinator.module_type, err
+        )
+
+
 def _async_register_services(
     hass: HomeAssistant,
-    coordinator: Coordinator,
+    coordinators: dict[str, Coordinator],
+    gateway: PHCGateway,
 ) -> None:
     """Register integration-level services."""
+    profilers = []
+    # Cancels the timer that stops the running recording
+    recording_stop = []
 
     async def async_refresh(call: ServiceCall) -> None:
-        """Service call to pause downloads in NZBGet."""
-        await coordinator.async_request_refresh()
+        """Service call to refresh all or only the selected modules."""
+        entity_ids = call.data.get(ATTR_ENTITY_ID)
+        addresses = call.data.get(CONF_ADDRESS)
+        module_types = call.data.get(ATTR_MODULE_TYPE)
+        if not (entity_ids or addresses or module_types):
+            await asyncio.gather(
+                *(
+                    coordinator.async_request_refresh()
+                    for coordinator in coordinators.values()
+                )
+            )
+            return
+
+        refreshes = []
+        for module_type, coordinator in coordinators.items():
+            modules = {
+                coordinator.entity_modules[entity_id]
+                for entity_id in entity_ids or []
+                if entity_id in coordinator.entity_modules
+            }
+            if (addresses or module_types) and (
+                not module_types or module_type in module_types
+            ):
+                modules |= {
+                    address
+                    for address in coordinator.entity_modules.values()
+                    if not addresses or address in addresses
+                }
+            if modules:
+                refreshes.append(coordinator.async_refresh_modules(modules))
+        await asyncio.gather(*refreshes)
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_REFRESH,
+        async_refresh,
+        schema=vol.Schema(
+            {
+                vol.Optional(ATTR_ENTITY_ID): cv.entity_ids,
+                vol.Optional(CONF_ADDRESS): vol.All(
+                    cv.ensure_list, [cv.positive_int]
+                ),
+                vol.Optional(ATTR_MODULE_TYPE): vol.All(
+                    cv.ensure_list, [vol.In(list(coordinators))]
+                ),
+            }
+        ),
+    )
+
+    async def async_profile(call: ServiceCall) -> None:
+        """Service call to profile the poll and command paths."""
+        if not profilers:
+            # cProfile and pstats are only loaded when profiling is used
+            from .profiler import PHCProfiler
+
+            profilers.append(PHCProfiler(hass, coordinators.values(), gateway))
+        profiler = profilers[0]
+        if profiler.active:
+            return
+
+        profiler.start()
+        if ATTR_CYCLES in call.data:
+            try:
+                for _ in range(call.data[ATTR_CYCLES]):
+                    await asyncio.gather(
+                        *(
+                            coordinator.async_refresh()
+                            for coordinator in coordinators.values()
+                        )
+                    )
+            finally:
+                await profiler.async_finish()
+            return
+
+        async def _async_finish(_now) -> None:
+            await profiler.async_finish()
+
+        async_call_later(hass, call.data[ATTR_SECONDS], _async_finish)
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_PROFILE,
+        async_profile,
+        schema=vol.Schema(
+            {
+                vol.Optional(ATTR_SECONDS, default=60): cv.positive_int,
+                vol.Optional(ATTR_CYCLES): cv.positive_int,
+            }
+        ),
+    )
+
+    async def async_record(call: ServiceCall) -> None:
+        """Service call to record STM telegram traffic."""
+        filename = hass.config.path(
+            f"phc_control_{time.strftime('%Y%m%d_%H%M%S')}.telegrams.gz"
+        )
+        # A new recording replaces the running one, including its stop timer
+        if recording_stop:
+            recording_stop.pop()()
+        await hass.async_add_executor_job(gateway.start_recording, filename)
+
+        async def _async_stop(_now) -> None:
+            recording_stop.clear()
+            await hass.async_add_executor_job(gateway.stop_recording)
+
+        recording_stop.append(
+            async_call_later(hass, call.data[ATTR_SECONDS], _async_stop)
+        )
 
     hass.services.async_register(
-        DOMAIN, SERVICE_REFRESH, async_refresh, schema=vol.Schema({})
+        DOMAIN,
+        SERVICE_RECORD,
+        async_record,
+        schema=vol.Schema({vol.Optional(ATTR_SECONDS, default=600): cv.positive_int}),
     )
 
 
@@ -80,6 +332,10 @@ async def _async_update_data(self):
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
-        coordinator = hass.data[DOMAIN].pop(entry.entry_id)
-        await coordinator.api.close()
+        coordinators = hass.data[DOMAIN].pop(str(entry.entry_id) + "_coordinators")
+        await asyncio.gather(
+            *(coordinator.async_save_usage() for coordinator in coordinators.values())
+        )
+        gateway = hass.data[DOMAIN].pop(str(entry.entry_id) + "_gateway")
+        await gateway.close()
     return unload_ok
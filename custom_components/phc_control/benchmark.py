@@ -0,0 +1,72 @@
+"""Import and setup time budget for the integration.
+
+Run from the repository root:
+
+    python -m custom_components.phc_control.benchmark
+
+Measures the time to import the integration and its platforms (with Home
+Assistant itself already loaded) in a fresh interpreter and exits with
+status 1 when it exceeds the budget.
+
+tests/test_benchmark.py holds the import time to IMPORT_BUDGET and the
+complete async_setup_entry, against a simulated STM with the module counts
+below, to SETUP_BUDGET.
+"""
+from __future__ import annotations
+
+import argparse
+import subprocess
+import sys
+
+IMPORT_BUDGET = 0.25
+SETUP_BUDGET = 1.0
+
+# Module counts of the reference installation
+OUTPUTS = 24
+DIMMERS = 8
+SHUTTERS = 6
+
+_IMPORT_SCRIPT = """
+import time
+import homeassistant.components.cover
+import homeassistant.components.light
+import homeassistant.components.sensor
+import homeassistant.config_entries
+import homeassistant.helpers.config_validation
+import homeassistant.helpers.update_coordinator
+start = time.perf_counter()
+import custom_components.phc_control
+import custom_components.phc_control.config_flow
+import custom_components.phc_control.cover
+import custom_components.phc_control.light
+import custom_components.phc_control.sensor
+print(time.perf_counter() - start)
+"""
+
+
+def measure_import() -> float:
+    """Return the integration import time in a fresh interpreter."""
+    result = subprocess.run(
+        [sys.executable, "-c", _IMPORT_SCRIPT],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Run the benchmark and enforce the import budget."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--import-budget", type=float, default=IMPORT_BUDGET)
+    args = parser.parse_args(argv)
+
+    import_time = measure_import()
+    print(f"import: {import_time * 1000:.1f}ms (budget {args.import_budget * 1000:.0f}ms)")
+
+    if import_time > args.import_budget:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
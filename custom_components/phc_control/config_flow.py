@@ -12,8 +12,9 @@ from homeassistant.helpers.selector import (
 import logging
 import voluptuous as vol
 
-from .phcgateway import PHCGateway
+from .stm.phcgateway import PHCGateway, RequestError
 from .const import (
+    CONF_CAPABILITIES,
     DOMAIN,
 )
 
@@ -41,10 +42,12 @@ class PHCConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             #            client_session=async_get_clientsession(self.hass),
         )
 
-        # try:
-        #    eight.check_host()
-        # except RequestError as err:
-        #     return str(err)
+        try:
+            config[CONF_CAPABILITIES] = await self.hass.async_add_executor_job(
+                eight.probe_capabilities
+            )
+        except RequestError as err:
+            return str(err)
 
         return None
 
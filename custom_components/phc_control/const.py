@@ -2,35 +2,49 @@
 
 from datetime import timedelta
 
-from attr import dataclass
 from homeassistant.const import Platform
 
 DOMAIN = "phc_control"
 SCAN_INTERVAL = timedelta(seconds=3600)
+OUTPUT_SCAN_INTERVAL = SCAN_INTERVAL
+# Wall dimmers ramp levels that the optimistic updates never see
+DIMMER_SCAN_INTERVAL = timedelta(minutes=15)
+# Shutter modules are read together with the output modules
+SHUTTER_SCAN_INTERVAL = None
+# Poll interval of the shutter modules while a channel is moving
+SHUTTER_MOVING_INTERVAL = timedelta(seconds=10)
+# Poll interval while modules of a class fail to answer
+OUTPUT_RETRY_INTERVAL = timedelta(minutes=1)
+DIMMER_RETRY_INTERVAL = timedelta(minutes=2)
+SHUTTER_RETRY_INTERVAL = None
+OUTPUT_CONCURRENCY = 2
+DIMMER_CONCURRENCY = 2
+SHUTTER_CONCURRENCY = 1
+# Consecutive failed polls before a module is marked unavailable
+OUTPUT_MAX_FAILURES = 2
+DIMMER_MAX_FAILURES = 2
+# Shutters are read once per output poll, a single miss is already stale
+SHUTTER_MAX_FAILURES = 1
 DEFAULT_NAME = "PHC Control"
 DATA_CLIENT = "client"
+CONF_CAPABILITIES = "capabilities"
+CAPABILITY_RECHECK_INTERVAL = timedelta(hours=24)
+# Longest time changed usage statistics wait to be written
+USAGE_SAVE_DELAY = timedelta(minutes=5)
 SERVICE_REFRESH = "refresh"
+SERVICE_PROFILE = "profile"
+SERVICE_RECORD = "record"
+SERVICE_TIMED_ON = "timed_on"
 
-PLATFORMS = [Platform.LIGHT, Platform.COVER]
+ATTR_SECONDS = "seconds"
+ATTR_CYCLES = "cycles"
+ATTR_MODULE_TYPE = "module_type"
+ATTR_DURATION = "duration"
+ATTR_TIMED_OFF_AT = "timed_off_at"
 
+MODULE_TYPE_OUTPUT = "output"
+MODULE_TYPE_DIMMER = "dimmer"
+MODULE_TYPE_SHUTTER = "shutter"
 
-@dataclass
-class OutputState:
-    """State of output module."""
+PLATFORMS = [Platform.LIGHT, Platform.COVER, Platform.SENSOR]
 
-    states: list[bool]
-
-
-@dataclass
-class DimmerState:
-    """State of output module."""
-
-    states: list[int]
-
-
-@dataclass
-class DeviceResponseEntry:
-    """Response."""
-
-    output: dict[int, OutputState]
-    dimmer: dict[int, DimmerState]
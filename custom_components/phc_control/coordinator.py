@@ -1,21 +1,64 @@
-"""Update coordinator for PHC."""
+"""Update coordinators for PHC."""
 from __future__ import annotations
 
+import asyncio
+from datetime import timedelta
 import logging
+from typing import TYPE_CHECKING, Any, Mapping
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 
-from .const import DOMAIN, SCAN_INTERVAL, DeviceResponseEntry
-from .phcgateway import PHCGateway
+from .const import (
+    DIMMER_CONCURRENCY,
+    DIMMER_MAX_FAILURES,
+    DIMMER_RETRY_INTERVAL,
+    DIMMER_SCAN_INTERVAL,
+    DOMAIN,
+    MODULE_TYPE_DIMMER,
+    MODULE_TYPE_OUTPUT,
+    MODULE_TYPE_SHUTTER,
+    OUTPUT_CONCURRENCY,
+    OUTPUT_MAX_FAILURES,
+    OUTPUT_RETRY_INTERVAL,
+    OUTPUT_SCAN_INTERVAL,
+    SHUTTER_CONCURRENCY,
+    SHUTTER_MAX_FAILURES,
+    SHUTTER_MOVING_INTERVAL,
+    SHUTTER_RETRY_INTERVAL,
+    SHUTTER_SCAN_INTERVAL,
+    USAGE_SAVE_DELAY,
+)
+from .state import PHCStateStore
+from .stm.const import SHUTTER_STOPPED
+from .usage import UsageAccumulator
+
+if TYPE_CHECKING:
+    from .stm.phcgateway import PHCGateway
 
 _LOGGER = logging.getLogger(__name__)
 
 
-class PHCUpdateCoordinator(DataUpdateCoordinator[DeviceResponseEntry]):
-    """Gather data for the energy device."""
+class PHCUpdateCoordinator(DataUpdateCoordinator[Mapping[int, Any]]):
+    """Poll the status of one class of PHC modules.
+
+    The data is a read-only snapshot of module address to module state from
+    a PHCStateStore; use set_channel to change it. Every module is
+    polled on its own; a module that fails more than max_failures
+    consecutive polls is reported in unavailable_modules while the other
+    modules keep updating. While modules fail, the class is polled every
+    retry_interval instead of update_interval_default.
+    """
 
+    module_type: str
+    update_interval_default: timedelta | None
+    retry_interval: timedelta | None
+    concurrency: int = 1
+    max_failures: int
+    # Full scale channel value for usage statistics, None disables them
+    usage_scale: float | None = None
     gateway: PHCGateway
     api_disabled: bool = False
 
@@ -27,56 +70,340 @@ class PHCUpdateCoordinator(DataUpdateCoordinator[DeviceResponseEntry]):
     ) -> None:
         """Initialize Update Coordinator."""
 
-        super().__init__(hass, _LOGGER, name=DOMAIN, update_interval=SCAN_INTERVAL)
+        super().__init__(
+            hass,
+            _LOGGER,
+            name=f"{DOMAIN}_{self.module_type}",
+            update_interval=self.update_interval_default,
+        )
         self.entry = entry
         self.gateway = gateway
+        # entity_id -> module address, filled by the entities
+        self.entity_modules: dict[str, int] = {}
+        self.unavailable_modules: set[int] = set()
+        self._failures: dict[int, int] = {}
+        self.store = PHCStateStore()
+        self._pending_modules: set[int] = set()
+        self._polling_modules: set[int] = set()
+        self._targeted_refresh: asyncio.Task | None = None
+        # Coordinator whose modules answer the same status telegram and are
+        # read in the same batch as ours
+        self.companion: PHCUpdateCoordinator | None = None
+        self.usage: UsageAccumulator | None = None
+        self._usage_store: Store | None = None
+        self._usage_save_scheduled = False
+        if self.usage_scale is not None:
+            self.usage = UsageAccumulator(self.usage_scale)
+            self._usage_store = Store(
+                hass, 1, f"{DOMAIN}.{entry.entry_id}.{self.module_type}_usage"
+            )
+
+    async def async_load_usage(self) -> None:
+        """Restore the persisted usage statistics."""
+        if self._usage_store is not None:
+            self.usage.restore(await self._usage_store.async_load())
+
+    async def async_save_usage(self) -> None:
+        """Persist the usage statistics."""
+        if self._usage_store is not None:
+            self._usage_save_scheduled = False
+            await self._usage_store.async_save(self.usage.as_dict())
+
+    @callback
+    def async_schedule_usage_save(self) -> None:
+        """Persist the usage statistics within USAGE_SAVE_DELAY.
 
-    async def _async_update_data(self) -> DeviceResponseEntry:
-        """Fetch all device and sensor data from api."""
-        output_modules = await self.hass.async_add_executor_job(
-            self.gateway.get_output_modules
+        Calls while a save is pending do not postpone it. A pending save is
+        written at the latest when Home Assistant shuts down.
+        """
+        if self._usage_store is None or self._usage_save_scheduled:
+            return
+        self._usage_save_scheduled = True
+        self._usage_store.async_delay_save(
+            self._usage_data, USAGE_SAVE_DELAY.total_seconds()
         )
-        output_data = {}
-        for output_module in output_modules:
-            output_data[output_module.address] = await self.hass.async_add_executor_job(
-                self.gateway.get_output_status, output_module.address
+
+    def _usage_data(self) -> dict[str, list]:
+        self._usage_save_scheduled = False
+        return self.usage.as_dict()
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Feed the new snapshot to the usage statistics and notify entities."""
+        if self.usage is not None:
+            self.usage.observe(self.data)
+            self.async_schedule_usage_save()
+        super().async_update_listeners()
+
+    def get_modules(self) -> list:
+        """Return the module descriptions handled by this coordinator."""
+        raise NotImplementedError
+
+    def get_status(self, address: int) -> Any:
+        """Read the status of a single module."""
+        raise NotImplementedError
+
+    def get_statuses(self, addresses: list[int]) -> dict[int, Any]:
+        """Read several modules in one request, returning state or exception."""
+        raise NotImplementedError
+
+    def decode(self, status: Any) -> Any:
+        """Convert a status read by get_status into the stored state."""
+        return status
+
+    async def _async_poll_module(
+        self, semaphore: asyncio.Semaphore, address: int
+    ) -> Any:
+        """Poll a module, returning the exception instead of raising it."""
+        async with semaphore:
+            try:
+                return await self.hass.async_add_executor_job(self.get_status, address)
+            except Exception as err:  # pylint: disable=broad-except
+                return err
+
+    def set_channel(self, address: int, channel: int, value: Any) -> None:
+        """Set the state of one channel after a command.
+
+        Safe to call from executor threads; listeners are notified on the
+        event loop.
+        """
+        self.store.set_channel(address, channel, value)
+        self.hass.loop.call_soon_threadsafe(self._async_publish)
+
+    @callback
+    def _async_publish(self) -> None:
+        """Publish the latest snapshot to the entities."""
+        self.data = self.store.snapshot
+        self.async_update_listeners()
+
+    async def _async_read_modules(self, addresses: list[int]) -> list[Any]:
+        """Read addresses, returning the status or exception of each module."""
+        if not addresses:
+            return []
+        if self.gateway.supports_multicall:
+            try:
+                statuses = await self.hass.async_add_executor_job(
+                    self.get_statuses, addresses
+                )
+                results = [statuses[address] for address in addresses]
+            except Exception as err:  # pylint: disable=broad-except
+                results = [err] * len(addresses)
+        else:
+            semaphore = asyncio.Semaphore(
+                min(self.concurrency, self.gateway.max_concurrency or self.concurrency)
             )
+            results = await asyncio.gather(
+                *(self._async_poll_module(semaphore, address) for address in addresses)
+            )
+        return results
+
+    def _process_results(
+        self, addresses: list[int], results: list[Any]
+    ) -> tuple[dict[int, Any], int]:
+        """Return the decoded states and the number of failed modules."""
+        data = {}
+        failed = 0
+        for address, result in zip(addresses, results):
+            if isinstance(result, Exception):
+                failed += 1
+                self._failures[address] = self._failures.get(address, 0) + 1
+                _LOGGER.debug(
+                    "Polling %s module %s failed: %s", self.module_type, address, result
+                )
+                if self._failures[address] > self.max_failures:
+                    self.unavailable_modules.add(address)
+                continue
+
+            self._failures.pop(address, None)
+            self.unavailable_modules.discard(address)
+            data[address] = self.decode(result)
+        return data, failed
 
-        dimmer_modules = await self.hass.async_add_executor_job(
-            self.gateway.get_dimmer_modules
+    async def _async_poll_modules(self, addresses) -> tuple[dict[int, Any], int]:
+        """Poll addresses and return the states and the number of failures."""
+        addresses = list(addresses)
+        return self._process_results(
+            addresses, await self._async_read_modules(addresses)
         )
-        dimmer_data = {}
-        for dimmer_module in dimmer_modules:
-            dimmer_data[dimmer_module.address] = await self.hass.async_add_executor_job(
-                self.gateway.get_dimmer_status, dimmer_module.address
-            )
 
-        data = DeviceResponseEntry(output=output_data, dimmer=dimmer_data)
-        # Update all properties
-        # try:
-        # data = DeviceResponseEntry(
-        #     device=await self.api.device(),
-        #     data=await self.api.data(),
-        #     features=await self.api.features(),
-        #     state=await self.api.state(),
-        # )
+    async def _async_get_addresses(self) -> list[int]:
+        """Return the addresses of the modules that have channels."""
+        modules = await self.hass.async_add_executor_job(self.get_modules)
+        return [module.address for module in modules if module.channels]
+
+    @callback
+    def _async_apply_companion_results(
+        self, addresses: list[int], results: list[Any], since: int
+    ) -> None:
+        """Store statuses that were read in the batch of another coordinator."""
+        data, _ = self._process_results(addresses, results)
+        self.async_set_updated_data(self.store.merge(data, since))
+
+    async def async_refresh_modules(self, addresses: set[int]) -> None:
+        """Poll only the given module addresses.
 
-        # if data.features.has_system:
-        #     data.system = await self.api.system()
+        Overlapping requests share one targeted refresh: modules that are
+        already being polled are not read again, the others are polled in
+        the next round of the running refresh.
+        """
+        if self.data is None:
+            await self.async_request_refresh()
+            return
 
-        # except Error as ex:
-        #     raise UpdateFailed(ex) from ex
+        self._pending_modules |= addresses - self._polling_modules
+        if self._targeted_refresh is None:
+            self._targeted_refresh = self.hass.async_create_task(
+                self._async_run_targeted_refresh()
+            )
+        await asyncio.shield(self._targeted_refresh)
 
-        # except DisabledError as ex:
-        #     if not self.api_disabled:
-        #         self.api_disabled = True
+    async def _async_run_targeted_refresh(self) -> None:
+        """Poll pending modules until no new requests arrive."""
+        try:
+            while self._pending_modules:
+                addresses = self._polling_modules = self._pending_modules
+                self._pending_modules = set()
+                since = self.store.version
+                data, _ = await self._async_poll_modules(sorted(addresses))
+                self.store.merge(data, since)
+                self._async_publish()
+        finally:
+            self._polling_modules = set()
+            self._targeted_refresh = None
 
-        #         # Do not reload when performing first refresh
-        #         if self.data is not None:
-        #             await self.hass.config_entries.async_reload(self.entry.entry_id)
+    async def _async_update_data(self) -> Mapping[int, Any]:
+        """Fetch the status of all modules of this class."""
+        addresses = await self._async_get_addresses()
+        companion = self.companion
+        companion_addresses = []
+        if companion is not None:
+            companion_addresses = await companion._async_get_addresses()
 
-        #     raise UpdateFailed(ex) from ex
+        since = self.store.version
+        companion_since = companion.store.version if companion else 0
+        results = await self._async_read_modules(addresses + companion_addresses)
+        data, failed = self._process_results(addresses, results[: len(addresses)])
+        if companion_addresses:
+            companion._async_apply_companion_results(
+                companion_addresses, results[len(addresses) :], companion_since
+            )
+        failing = self._failures or (companion is not None and companion._failures)
+        self.update_interval = (
+            self.retry_interval if failing else self.update_interval_default
+        )
+        if addresses and failed == len(addresses):
+            raise UpdateFailed(f"No {self.module_type} module answered")
 
         self.api_disabled = False
 
+        return self.store.merge(data, since)
+
+
+class PHCOutputCoordinator(PHCUpdateCoordinator):
+    """Poll output (AMD) modules."""
+
+    module_type = MODULE_TYPE_OUTPUT
+    update_interval_default = OUTPUT_SCAN_INTERVAL
+    retry_interval = OUTPUT_RETRY_INTERVAL
+    concurrency = OUTPUT_CONCURRENCY
+    max_failures = OUTPUT_MAX_FAILURES
+    usage_scale = 1
+
+    def get_modules(self) -> list:
+        """Return the output modules."""
+        return self.gateway.get_output_modules()
+
+    def get_status(self, address: int) -> Any:
+        """Read the status of an output module."""
+        return self.gateway.get_output_status(address)
+
+    def get_statuses(self, addresses: list[int]) -> dict[int, Any]:
+        """Read several output modules in one request."""
+        return self.gateway.get_output_statuses(addresses)
+
+
+class PHCDimmerCoordinator(PHCUpdateCoordinator):
+    """Poll dimmer (DIM) modules."""
+
+    module_type = MODULE_TYPE_DIMMER
+    update_interval_default = DIMMER_SCAN_INTERVAL
+    retry_interval = DIMMER_RETRY_INTERVAL
+    concurrency = DIMMER_CONCURRENCY
+    max_failures = DIMMER_MAX_FAILURES
+    usage_scale = 255
+
+    def get_modules(self) -> list:
+        """Return the dimmer modules."""
+        return self.gateway.get_dimmer_modules()
+
+    def get_status(self, address: int) -> Any:
+        """Read the status of a dimmer module."""
+        return self.gateway.get_dimmer_status(address)
+
+    def get_statuses(self, addresses: list[int]) -> dict[int, Any]:
+        """Read several dimmer modules in one request."""
+        return self.gateway.get_dimmer_statuses(addresses)
+
+
+class PHCShutterCoordinator(PHCUpdateCoordinator):
+    """Poll shutter (JRM) modules.
+
+    Without an own update interval; the output coordinator reads these
+    modules in its batch (see companion). While a channel is moving the
+    modules are polled every SHUTTER_MOVING_INTERVAL until it stops.
+    """
+
+    module_type = MODULE_TYPE_SHUTTER
+    update_interval_default = SHUTTER_SCAN_INTERVAL
+    retry_interval = SHUTTER_RETRY_INTERVAL
+    concurrency = SHUTTER_CONCURRENCY
+    max_failures = SHUTTER_MAX_FAILURES
+
+    def get_modules(self) -> list:
+        """Return the shutter modules."""
+        return self.gateway.get_shutter_modules()
+
+    def get_status(self, address: int) -> Any:
+        """Read the relay status of a shutter module."""
+        return self.gateway.get_output_status(address)
+
+    def decode(self, status: Any) -> Any:
+        """Decode the relays into the motion of each channel."""
+        return self.gateway.decode_shutter_state(status)
+
+    def get_statuses(self, addresses: list[int]) -> dict[int, Any]:
+        """Read the relay status of several shutter modules in one request."""
+        return self.gateway.get_output_statuses(addresses)
+
+    def _interval(self, data: Mapping[int, Any] | None) -> timedelta | None:
+        """Return the poll interval for data."""
+        moving = any(
+            motion != SHUTTER_STOPPED
+            for state in (data or {}).values()
+            for motion in state.states
+        )
+        if moving:
+            return SHUTTER_MOVING_INTERVAL
+        return self.retry_interval if self._failures else self.update_interval_default
+
+    async def _async_update_data(self) -> Mapping[int, Any]:
+        """Poll the modules, again soon while a channel is moving."""
+        data = await super()._async_update_data()
+        self.update_interval = self._interval(data)
         return data
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Start polling when a command or the output batch reports motion."""
+        interval = self._interval(self.data)
+        if interval != self.update_interval:
+            self.update_interval = interval
+            self._schedule_refresh()
+        super().async_update_listeners()
+
+
+COORDINATORS: list[type[PHCUpdateCoordinator]] = [
+    PHCOutputCoordinator,
+    PHCDimmerCoordinator,
+    PHCShutterCoordinator,
+]
@@ -1,12 +1,13 @@
 """Platform for light integration."""
 from __future__ import annotations
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
 import logging
 import voluptuous as vol
 
-from homeassistant.core import HomeAssistant
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.event import async_call_later
 from homeassistant.helpers.typing import ConfigType
 
 import homeassistant.helpers.config_validation as cv
@@ -24,10 +25,13 @@ from homeassistant.const import (
     CONF_TYPE,
 )
 
-from .const import DOMAIN
+from .const import DOMAIN, MODULE_TYPE_SHUTTER
 from .coordinator import PHCUpdateCoordinator
 from .entity import PHCEntity
-from .phcgateway import PHCGateway
+from .stm.const import SHUTTER_CLOSING, SHUTTER_OPENING, SHUTTER_STOPPED
+
+if TYPE_CHECKING:
+    from .stm.phcgateway import PHCGateway
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -60,8 +64,8 @@ async def async_setup_entry(
     hass: HomeAssistant, entry: ConfigType, add_entities: AddEntitiesCallback
 ) -> None:
     """Set up the PHC Lights platform."""
-    coordinator: PHCUpdateCoordinator = hass.data[DOMAIN][
-        str(entry.entry_id) + "_coordinator"
+    coordinators: dict[str, PHCUpdateCoordinator] = hass.data[DOMAIN][
+        str(entry.entry_id) + "_coordinators"
     ]
     gateway: PHCGateway = hass.data[DOMAIN][str(entry.entry_id) + "_gateway"]
 
@@ -77,7 +81,7 @@ async def async_setup_entry(
                         module.channels.get(key).name,
                         module.channels.get(key).runtime,
                         gateway,
-                        coordinator,
+                        coordinators[MODULE_TYPE_SHUTTER],
                     )
                 ],
                 False,
@@ -103,10 +107,11 @@ class PhcCoverEntity(CoverEntity, PHCEntity):
         self._channel = channel
         self._phc_gateway = phc_gateway
         self._name = channel_name
-        self._attr_is_closed = None
-        self._attr_is_closing = None
-        self._attr_is_opening = None
         self._runtime = runtime
+        # Last direction the cover moved in, to tell open from closed
+        self._last_motion: int | None = None
+        # Cancels the timer that marks the running move stopped
+        self._stop_unsub: CALLBACK_TYPE | None = None
 
     @property
     def name(self) -> str:
@@ -118,6 +123,52 @@ class PhcCoverEntity(CoverEntity, PHCEntity):
         """Return a unique, Home Assistant friendly identifier for this entity."""
         return "" + str(self._address) + " " + str(self._channel)
 
+    @property
+    def _motion(self) -> int | None:
+        """Return the current SHUTTER_* motion of this channel."""
+        if self.coordinator.data is None:
+            return None
+        moduledata = self.coordinator.data.get(self._address)
+
+        if moduledata is None:
+            return None
+        return moduledata.states[self._channel]
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Remember the direction of the last movement.
+
+        A move found by a poll, e.g. one started from a wall switch, is
+        expected to stop after the runtime like a move commanded here.
+        """
+        motion = self._motion
+        if motion in (SHUTTER_OPENING, SHUTTER_CLOSING):
+            self._last_motion = motion
+            if self._stop_unsub is None:
+                self._async_expect_stop()
+        else:
+            self._async_cancel_expected_stop()
+        super()._handle_coordinator_update()
+
+    @property
+    def is_opening(self) -> bool | None:
+        """Return whether the cover is opening."""
+        motion = self._motion
+        return None if motion is None else motion == SHUTTER_OPENING
+
+    @property
+    def is_closing(self) -> bool | None:
+        """Return whether the cover is closing."""
+        motion = self._motion
+        return None if motion is None else motion == SHUTTER_CLOSING
+
+    @property
+    def is_closed(self) -> bool | None:
+        """Return whether the cover last moved down."""
+        if self._last_motion is None:
+            return None
+        return self._last_motion == SHUTTER_CLOSING
+
     @property
     def current_cover_position(self) -> int | None:
         """Return the current position of the roller blind.
@@ -136,14 +187,48 @@ class PhcCoverEntity(CoverEntity, PHCEntity):
 
         return supported_features
 
+    @callback
+    def _async_cancel_expected_stop(self) -> None:
+        """Cancel the timer of the previous move."""
+        if self._stop_unsub is not None:
+            self._stop_unsub()
+            self._stop_unsub = None
+
+    @callback
+    def _async_expect_stop(self) -> None:
+        """Mark the channel stopped once the module's runtime has passed."""
+        self._async_cancel_expected_stop()
+        motion = self._motion
+
+        @callback
+        def _async_stopped(_now) -> None:
+            self._stop_unsub = None
+            if self._motion == motion:
+                self.coordinator.set_channel(
+                    self._address, self._channel, SHUTTER_STOPPED
+                )
+
+        self._stop_unsub = async_call_later(self.hass, self._runtime, _async_stopped)
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Cancel the timer of a running move."""
+        self._async_cancel_expected_stop()
+        await super().async_will_remove_from_hass()
+
     def close_cover(self, **kwargs: Any) -> None:
         """Close the roller."""
         self._phc_gateway.close_shutter(self._address, self._channel, self._runtime)
+        self.coordinator.set_channel(self._address, self._channel, SHUTTER_CLOSING)
+        self.hass.loop.call_soon_threadsafe(self._async_expect_stop)
 
     def open_cover(self, **kwargs: Any) -> None:
         """Open the roller."""
         self._phc_gateway.open_shutter(self._address, self._channel, self._runtime)
+        self.coordinator.set_channel(self._address, self._channel, SHUTTER_OPENING)
+        self.hass.loop.call_soon_threadsafe(self._async_expect_stop)
 
     def stop_cover(self, **kwargs: Any) -> None:
         """Stop the roller."""
         self._phc_gateway.stop_shutter(self._address, self._channel)
+        self.hass.loop.call_soon_threadsafe(self._async_cancel_expected_stop)
+        self.coordinator.set_channel(self._address, self._channel, SHUTTER_STOPPED)
@@ -0,0 +1,36 @@
+"""Diagnostics support for PHC."""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import CONF_CAPABILITIES, DOMAIN
+from .coordinator import PHCUpdateCoordinator
+
+if TYPE_CHECKING:
+    from .stm.phcgateway import PHCGateway
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return the transport settings, status cache use and polling state."""
+    gateway: PHCGateway = hass.data[DOMAIN][str(entry.entry_id) + "_gateway"]
+    coordinators: dict[str, PHCUpdateCoordinator] = hass.data[DOMAIN][
+        str(entry.entry_id) + "_coordinators"
+    ]
+
+    return {
+        "capabilities": entry.data.get(CONF_CAPABILITIES),
+        "status_cache": gateway.cache_stats,
+        "coordinators": {
+            module_type: {
+                "update_interval": str(coordinator.update_interval),
+                "last_update_success": coordinator.last_update_success,
+                "unavailable_modules": sorted(coordinator.unavailable_modules),
+            }
+            for module_type, coordinator in coordinators.items()
+        },
+    }
@@ -4,6 +4,7 @@ from __future__ import annotations
 from homeassistant.helpers.entity import DeviceInfo
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
+from .const import DOMAIN
 from .coordinator import PHCUpdateCoordinator
 
 
@@ -19,8 +20,27 @@ class PHCEntity(CoordinatorEntity[PHCUpdateCoordinator]):
 
         super().__init__(coordinator=coordinator)
         self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, f"{coordinator.entry.entry_id}_{type}_{address}")},
             name="PHC " + type + " (" + str(address) + ")",
             manufacturer="Peha",
             sw_version="1",
             model="PHC " + type,
         )
+
+    @property
+    def available(self) -> bool:
+        """Return False when the module of this entity stopped answering."""
+        return (
+            super().available
+            and self._address not in self.coordinator.unavailable_modules
+        )
+
+    async def async_added_to_hass(self) -> None:
+        """Register the module this entity belongs to with the coordinator."""
+        await super().async_added_to_hass()
+        self.coordinator.entity_modules[self.entity_id] = self._address
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Unregister the entity from the coordinator."""
+        self.coordinator.entity_modules.pop(self.entity_id, None)
+        await super().async_will_remove_from_hass()
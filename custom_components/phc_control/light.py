@@ -1,18 +1,30 @@
 """Platform for light integration."""
 from __future__ import annotations
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
 import logging
+import time
 import voluptuous as vol
 
-from homeassistant.core import HomeAssistant
+from datetime import datetime, timedelta
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.helpers import entity_platform
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.event import (
+    async_track_point_in_utc_time,
+    async_track_time_interval,
+)
+from homeassistant.helpers.restore_state import RestoreEntity
 from homeassistant.helpers.typing import ConfigType
 
 import homeassistant.helpers.config_validation as cv
+import homeassistant.util.dt as dt_util
 
 from homeassistant.components.light import (
     ATTR_BRIGHTNESS,
+    ATTR_TRANSITION,
     PLATFORM_SCHEMA,
     ColorMode,
     LightEntity,
@@ -24,10 +36,20 @@ from homeassistant.const import (
     CONF_TYPE,
 )
 
-from .const import DOMAIN
+from .const import (
+    ATTR_DURATION,
+    ATTR_TIMED_OFF_AT,
+    DOMAIN,
+    MODULE_TYPE_DIMMER,
+    MODULE_TYPE_OUTPUT,
+    SERVICE_TIMED_ON,
+)
 from .coordinator import PHCUpdateCoordinator
 from .entity import PHCEntity
-from .phcgateway import PHCGateway
+from .stm.const import MAX_RAMP_TIME, MAX_TIMED_DURATION
+
+if TYPE_CHECKING:
+    from .stm.phcgateway import PHCGateway
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -60,11 +82,26 @@ async def async_setup_entry(
     hass: HomeAssistant, entry: ConfigType, add_entities: AddEntitiesCallback
 ) -> None:
     """Set up the PHC Lights platform."""
-    coordinator: PHCUpdateCoordinator = hass.data[DOMAIN][
-        str(entry.entry_id) + "_coordinator"
+    coordinators: dict[str, PHCUpdateCoordinator] = hass.data[DOMAIN][
+        str(entry.entry_id) + "_coordinators"
     ]
     gateway: PHCGateway = hass.data[DOMAIN][str(entry.entry_id) + "_gateway"]
 
+    platform = entity_platform.async_get_current_platform()
+    platform.async_register_entity_service(
+        SERVICE_TIMED_ON,
+        {
+            vol.Required(ATTR_DURATION): vol.All(
+                cv.positive_time_period,
+                vol.Range(
+                    min=timedelta(seconds=1),
+                    max=timedelta(seconds=MAX_TIMED_DURATION),
+                ),
+            )
+        },
+        "async_turn_on_timed",
+    )
+
     output_modules = await hass.async_add_executor_job(gateway.get_output_modules)
     for module in output_modules:
         for key in module.channels:
@@ -76,7 +113,7 @@ async def async_setup_entry(
                         key,
                         module.channels.get(key),
                         gateway,
-                        coordinator,
+                        coordinators[MODULE_TYPE_OUTPUT],
                     )
                 ],
                 False,
@@ -93,7 +130,7 @@ async def async_setup_entry(
                         key,
                         module.channels.get(key),
                         gateway,
-                        coordinator,
+                        coordinators[MODULE_TYPE_DIMMER],
                     )
                 ],
                 False,
@@ -107,7 +144,7 @@ class PhcOutputDevice:
         self._host = host
 
 
-class PhcOutputLightSensor(LightEntity, PHCEntity):
+class PhcOutputLightSensor(LightEntity, PHCEntity, RestoreEntity):
     """Representation of a Sensor."""
 
     _attr_color_mode = ColorMode.ONOFF
@@ -128,6 +165,8 @@ class PhcOutputLightSensor(LightEntity, PHCEntity):
         self._channel = channel
         self._phc_gateway = phc_gateway
         self._name = channel_name
+        self._timed_off_at: datetime | None = None
+        self._timed_off_unsub: CALLBACK_TYPE | None = None
 
     @property
     def name(self) -> str:
@@ -139,24 +178,83 @@ class PhcOutputLightSensor(LightEntity, PHCEntity):
         """Return a unique, Home Assistant friendly identifier for this entity."""
         return "" + str(self._address) + " " + str(self._channel)
 
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        """Return when a timed on will switch the output off."""
+        if self._timed_off_at is None:
+            return None
+        return {ATTR_TIMED_OFF_AT: self._timed_off_at.isoformat()}
+
+    async def async_added_to_hass(self) -> None:
+        """Resume waiting for a timed on that was running before a restart."""
+        await super().async_added_to_hass()
+        if not self.is_on or (last_state := await self.async_get_last_state()) is None:
+            return
+        timed_off_at = dt_util.parse_datetime(
+            last_state.attributes.get(ATTR_TIMED_OFF_AT) or ""
+        )
+        if timed_off_at is not None and timed_off_at > dt_util.utcnow():
+            self._async_schedule_timed_off(timed_off_at)
+
+    @callback
+    def _async_schedule_timed_off(self, timed_off_at: datetime) -> None:
+        """Mirror the module switching the output off at timed_off_at."""
+        self._async_cancel_timed_off()
+        self._timed_off_at = timed_off_at
+
+        @callback
+        def _async_expire(_now) -> None:
+            self._timed_off_unsub = None
+            self._timed_off_at = None
+            self.coordinator.set_channel(self._address, self._channel, False)
+
+        self._timed_off_unsub = async_track_point_in_utc_time(
+            self.hass, _async_expire, timed_off_at
+        )
+
+    @callback
+    def _async_cancel_timed_off(self) -> None:
+        """Forget a running timed on."""
+        self._timed_off_at = None
+        if self._timed_off_unsub is not None:
+            self._timed_off_unsub()
+            self._timed_off_unsub = None
+
     def turn_on(self, **kwargs):
         """Turn light on."""
         self._phc_gateway.turn_output_on(self._address, self._channel)
-        self.coordinator.data.output[self._address].states[self._channel] = True
-        self.coordinator.async_update_listeners()
+        self.hass.loop.call_soon_threadsafe(self._async_cancel_timed_off)
+        self.coordinator.set_channel(self._address, self._channel, True)
+
+    async def async_turn_on_timed(self, duration: timedelta) -> None:
+        """Turn light on and let the output module switch it off after duration."""
+        seconds = int(duration.total_seconds())
+        await self.hass.async_add_executor_job(
+            self._phc_gateway.turn_output_on_timed,
+            self._address,
+            self._channel,
+            seconds,
+        )
+        self._async_schedule_timed_off(dt_util.utcnow() + timedelta(seconds=seconds))
+        self.coordinator.set_channel(self._address, self._channel, True)
 
     def turn_off(self, **kwargs):
         """Turn light off."""
         self._phc_gateway.turn_output_off(self._address, self._channel)
-        self.coordinator.data.output[self._address].states[self._channel] = False
-        self.coordinator.async_update_listeners()
+        self.hass.loop.call_soon_threadsafe(self._async_cancel_timed_off)
+        self.coordinator.set_channel(self._address, self._channel, False)
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Stop waiting for a timed on to expire."""
+        self._async_cancel_timed_off()
+        await super().async_will_remove_from_hass()
 
     @property
     def is_on(self):
         """Return whether this light is on or off."""
         if self.coordinator.data is None:
             return None
-        moduledata = self.coordinator.data.output.get(self._address)
+        moduledata = self.coordinator.data.get(self._address)
 
         if moduledata is None:
             return None
@@ -186,6 +284,11 @@ class PhcDimmerLightSensor(LightEntity, PHCEntity):
         self._name = channel_name
         self._attr_color_mode = ColorMode.BRIGHTNESS
         self._attr_supported_color_modes = {ColorMode.BRIGHTNESS}
+        # (start, duration, from level, to level) of a running hardware ramp
+        self._ramp: tuple[float, float, int, int] | None = None
+        self._ramp_unsub = None
+        # Last level the channel was on at, restored by turn_on
+        self._restore_brightness: int | None = None
 
     @property
     def name(self) -> str:
@@ -195,39 +298,113 @@ class PhcDimmerLightSensor(LightEntity, PHCEntity):
     @property
     def unique_id(self) -> str:
         """Return a unique, Home Assistant friendly identifier for this entity."""
-        return "" + str(self._address) + " " + str(self._channel)
+        # Output and dimmer modules share addresses, keep the module type
+        return "dimmer " + str(self._address) + " " + str(self._channel)
+
+    @property
+    def _level(self) -> int | None:
+        """Return the stored level of this channel."""
+        if self.coordinator.data is None:
+            return None
+        moduledata = self.coordinator.data.get(self._address)
+        if moduledata is None:
+            return None
+        return moduledata.states[self._channel]
+
+    async def async_added_to_hass(self) -> None:
+        """Remember the level the channel is on at."""
+        await super().async_added_to_hass()
+        self._restore_brightness = self._level or None
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Remember the last level the channel was on at."""
+        if level := self._level:
+            self._restore_brightness = level
+        super()._handle_coordinator_update()
 
     def turn_on(self, **kwargs):
         """Turn light on."""
         attribs: dict[str, Any] = {}
 
+        if ATTR_TRANSITION in kwargs:
+            # Without a brightness, ramp to the level the light is or was on at
+            brightness = kwargs.get(
+                ATTR_BRIGHTNESS, self._level or self._restore_brightness
+            )
+            if brightness is not None:
+                self._dim_with_transition(int(brightness), kwargs[ATTR_TRANSITION])
+                return
+            # Unknown level, let the module restore it like a plain turn on
+
         if ATTR_BRIGHTNESS in kwargs:
             brightness = int(kwargs[ATTR_BRIGHTNESS])
             attribs["brightness"] = brightness
 
             self._phc_gateway.turn_dimmer_set(self._address, self._channel, brightness)
-            self.coordinator.data.dimmer[self._address].states[
-                self._channel
-            ] = brightness
-            self.coordinator.async_update_listeners()
+            self.coordinator.set_channel(self._address, self._channel, brightness)
         else:
             self._phc_gateway.turn_dimmer_on(self._address, self._channel)
-            self.coordinator.data.dimmer[self._address].states[self._channel] = 128
-            self.coordinator.async_update_listeners()
+            self.coordinator.set_channel(self._address, self._channel, 128)
+
+    async def async_turn_on_timed(self, duration: timedelta) -> None:
+        """Reject timed on, only output modules have a switch-off timer."""
+        raise ServiceValidationError(
+            f"{self.entity_id} is a dimmer; timed_on only supports output channels"
+        )
 
     def turn_off(self, **kwargs):
         """Turn light off."""
+        if ATTR_TRANSITION in kwargs:
+            self._dim_with_transition(0, kwargs[ATTR_TRANSITION])
+            return
+
         # self._phc_gateway.turn_output_off(self._address, self._channel)
         self._phc_gateway.turn_dimmer_off(self._address, self._channel)
-        self.coordinator.data.dimmer[self._address].states[self._channel] = 0
-        self.coordinator.async_update_listeners()
+        self.coordinator.set_channel(self._address, self._channel, 0)
+
+    def _dim_with_transition(self, brightness: int, transition: float) -> None:
+        """Let the dimmer ramp to brightness and interpolate the level locally."""
+        ramptime = max(0, min(MAX_RAMP_TIME, round(transition)))
+        start_level = self.brightness or 0
+        self._phc_gateway.turn_dimmer_set(
+            self._address, self._channel, brightness, ramptime
+        )
+        self._ramp = (time.monotonic(), ramptime, start_level, brightness)
+        self.coordinator.set_channel(self._address, self._channel, brightness)
+        if ramptime:
+            self.hass.loop.call_soon_threadsafe(self._async_track_ramp)
+
+    @callback
+    def _async_track_ramp(self) -> None:
+        """Write the interpolated brightness every second during a ramp."""
+        if self._ramp_unsub is None:
+            self._ramp_unsub = async_track_time_interval(
+                self.hass, self._async_ramp_tick, timedelta(seconds=1)
+            )
+
+    @callback
+    def _async_ramp_tick(self, _now) -> None:
+        if self._ramp is None or time.monotonic() >= self._ramp[0] + self._ramp[1]:
+            self._ramp = None
+            if self._ramp_unsub is not None:
+                self._ramp_unsub()
+                self._ramp_unsub = None
+        self.async_write_ha_state()
+
+    async def async_will_remove_from_hass(self) -> None:
+        """Stop ramp updates."""
+        if self._ramp_unsub is not None:
+            self._ramp_unsub()
+            self._ramp_unsub = None
+        await super().async_will_remove_from_hass()
 
     @property
     def is_on(self):
         """Return whether this light is on or off."""
         if self.coordinator.data is None:
             return None
-        moduledata = self.coordinator.data.dimmer.get(self._address)
+        moduledata = self.coordinator.data.get(self._address)
 
         if moduledata is None:
             return None
@@ -235,14 +412,14 @@ class PhcDimmerLightSensor(LightEntity, PHCEntity):
         # print(
         #     f"value for DIM{str(self._address)}.{str(self._channel)}: {moduledata.states[self._channel]}"
         # )
-        return moduledata.states[self._channel] > 0
+        return self.brightness > 0
 
     @property
     def brightness(self):
         """Return the brightness of this light between 0..255."""
         if self.coordinator.data is None:
             return None
-        moduledata = self.coordinator.data.dimmer.get(self._address)
+        moduledata = self.coordinator.data.get(self._address)
 
         if moduledata is None:
             return None
@@ -250,7 +427,14 @@ class PhcDimmerLightSensor(LightEntity, PHCEntity):
         # print(
         #     f"value for DIM{str(self._address)}.{str(self._channel)}: {moduledata.states[self._channel]}"
         # )
-        return moduledata.states[self._channel]
+        level = moduledata.states[self._channel]
+        if self._ramp is not None:
+            start, duration, from_level, to_level = self._ramp
+            elapsed = time.monotonic() - start
+            # Only interpolate while nothing else changed the target level
+            if elapsed < duration and level == to_level:
+                return round(from_level + (to_level - from_level) * elapsed / duration)
+        return level
 
     async def async_update(self) -> None:
         """Update brightness."""
@@ -265,4 +449,4 @@ class PhcDimmerLightSensor(LightEntity, PHCEntity):
     @property
     def supported_features(self) -> LightEntityFeature:
         """Flag supported features."""
-        return LightEntityFeature(0)
+        return LightEntityFeature.TRANSITION
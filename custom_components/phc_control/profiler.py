@@ -0,0 +1,186 @@
+"""On-demand profiler for the PHC poll and command paths."""
+from __future__ import annotations
+
+import cProfile
+import functools
+import io
+import logging
+import pstats
+import threading
+import time
+
+from homeassistant.core import HomeAssistant
+
+_LOGGER = logging.getLogger(__name__)
+
+# Gateway methods that do the actual (blocking) work on executor threads.
+PROFILED_GATEWAY_METHODS = [
+    "get_output_status",
+    "get_output_statuses",
+    "get_dimmer_status",
+    "get_dimmer_statuses",
+    "send_telegrams",
+    "output_command",
+    "dimmer_command",
+    "turn_dimmer_set",
+    "open_shutter",
+    "close_shutter",
+    "get_project",
+    "get_output_modules",
+    "get_dimmer_modules",
+    "get_shutter_modules",
+]
+
+
+class PHCProfiler:
+    """Profile the coordinator and gateway while a session is active.
+
+    Profiling is installed by shadowing the methods on the instances and
+    removed again by deleting the shadows, so nothing is left in the call
+    path when no session is running.
+
+    A session uses a single cProfile instance. Only one profiler can be
+    active per interpreter on Python 3.12 and later, so profiled gateway
+    calls are serialized while a session runs.
+    """
+
+    def __init__(self, hass: HomeAssistant, coordinators, gateway) -> None:
+        self._hass = hass
+        self._coordinators = list(coordinators)
+        self._gateway = gateway
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._profile: cProfile.Profile | None = None
+        self._calls = 0
+        self._cycle_times: list[float] = []
+        self._started: float | None = None
+
+    @property
+    def active(self) -> bool:
+        """Return True while a profiling session is running."""
+        return self._started is not None
+
+    def start(self) -> None:
+        """Install the profiling wrappers."""
+        if self.active or self._profile is not None:
+            return
+
+        self._profile = cProfile.Profile()
+        self._calls = 0
+        self._cycle_times = []
+        self._started = time.monotonic()
+
+        for name in PROFILED_GATEWAY_METHODS:
+            setattr(self._gateway, name, self._wrap_sync(getattr(self._gateway, name)))
+        for coordinator in self._coordinators:
+            coordinator._async_update_data = self._wrap_update(
+                coordinator._async_update_data
+            )
+
+    def stop(self) -> None:
+        """Remove the profiling wrappers."""
+        if not self.active:
+            return
+
+        for name in PROFILED_GATEWAY_METHODS:
+            self._gateway.__dict__.pop(name, None)
+        for coordinator in self._coordinators:
+            coordinator.__dict__.pop("_async_update_data", None)
+        self._started = None
+
+    def _collect_stats(self) -> pstats.Stats | None:
+        """Return the session stats once the running gateway call finished."""
+        with self._lock:
+            profile = self._profile
+            self._profile = None
+        if profile is None or not self._calls:
+            return None
+        return pstats.Stats(profile)
+
+    def _wrap_sync(self, func):
+        """Run a blocking gateway call under the session profile."""
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            # Nested gateway calls (get_output_modules -> get_project) are
+            # already covered by the outer call.
+            if getattr(self._local, "busy", False):
+                return func(*args, **kwargs)
+
+            with self._lock:
+                self._local.busy = True
+                try:
+                    return self._runcall(func, *args, **kwargs)
+                finally:
+                    self._local.busy = False
+
+        return wrapper
+
+    def _runcall(self, func, *args, **kwargs):
+        """Call func under the session profile, with _lock held."""
+        profile = self._profile
+        if profile is None:
+            # The session ended while this call was waiting
+            return func(*args, **kwargs)
+        try:
+            profile.enable()
+        except ValueError as err:
+            # Another profiling tool is active (Python 3.12+)
+            _LOGGER.debug("Unable to profile %s: %s", func.__name__, err)
+            return func(*args, **kwargs)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profile.disable()
+            self._calls += 1
+
+    def _wrap_update(self, func):
+        """Time coordinator poll cycles.
+
+        The cycle itself only awaits executor jobs, which are profiled by the
+        gateway wrappers, so only its wall time is recorded here.
+        """
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                self._cycle_times.append(time.perf_counter() - start)
+
+        return wrapper
+
+    async def async_finish(self, top: int = 20) -> str | None:
+        """Stop the session, write the stats file and log the hot spots."""
+        duration = time.monotonic() - self._started if self.active else 0
+        cycle_times = self._cycle_times
+        self.stop()
+        stats = await self._hass.async_add_executor_job(self._collect_stats)
+
+        if cycle_times:
+            _LOGGER.warning(
+                "PHC profile: %d poll cycles, avg %.3fs, max %.3fs",
+                len(cycle_times),
+                sum(cycle_times) / len(cycle_times),
+                max(cycle_times),
+            )
+
+        _LOGGER.warning("PHC profile: status cache %s", self._gateway.cache_stats)
+
+        if stats is None:
+            _LOGGER.warning("PHC profile: no gateway calls recorded in %.1fs", duration)
+            return None
+
+        filename = self._hass.config.path(
+            f"phc_control_profile_{time.strftime('%Y%m%d_%H%M%S')}.prof"
+        )
+        await self._hass.async_add_executor_job(stats.dump_stats, filename)
+
+        stream = io.StringIO()
+        stats.stream = stream
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(top)
+        _LOGGER.warning(
+            "PHC profile written to %s (%.1fs)\n%s", filename, duration, stream.getvalue()
+        )
+        return filename
@@ -0,0 +1,158 @@
+"""Platform for usage statistics sensors."""
+from __future__ import annotations
+
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorStateClass,
+)
+from homeassistant.const import UnitOfTime
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.entity import EntityCategory
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.typing import ConfigType
+
+from .const import DOMAIN, MODULE_TYPE_DIMMER, MODULE_TYPE_OUTPUT
+from .coordinator import PHCUpdateCoordinator
+from .entity import PHCEntity
+
+ON_TIME = 0
+SWITCH_COUNT = 1
+WEIGHTED_ON_TIME = 2
+
+
+async def async_setup_entry(
+    hass: HomeAssistant, entry: ConfigType, add_entities: AddEntitiesCallback
+) -> None:
+    """Set up the PHC usage statistics sensors."""
+    coordinators: dict[str, PHCUpdateCoordinator] = hass.data[DOMAIN][
+        str(entry.entry_id) + "_coordinators"
+    ]
+
+    entities: list[PhcUsageSensor] = []
+    for type, module_type, sensor_classes in (
+        ("Output", MODULE_TYPE_OUTPUT, (PhcOnTimeSensor, PhcSwitchCountSensor)),
+        (
+            "Dimmer",
+            MODULE_TYPE_DIMMER,
+            (PhcOnTimeSensor, PhcSwitchCountSensor, PhcWeightedOnTimeSensor),
+        ),
+    ):
+        coordinator = coordinators[module_type]
+        modules = await hass.async_add_executor_job(coordinator.get_modules)
+        for module in modules:
+            for key in module.channels:
+                entities.extend(
+                    sensor_class(
+                        type,
+                        module.address,
+                        key,
+                        module.channels.get(key),
+                        coordinator,
+                    )
+                    for sensor_class in sensor_classes
+                )
+    add_entities(entities, False)
+
+
+class PhcUsageSensor(SensorEntity, PHCEntity):
+    """Usage statistic of one channel, read from the coordinator's accumulator.
+
+    The state is only written when the channel itself changed; every
+    publish of the coordinator would otherwise write all usage sensors.
+    """
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_state_class = SensorStateClass.TOTAL_INCREASING
+    _statistic: int
+    _suffix: str
+
+    def __init__(
+        self,
+        type: str,
+        address: int,
+        channel: int,
+        channel_name: str,
+        coordinator: PHCUpdateCoordinator,
+    ) -> None:
+        super().__init__(type, address, coordinator)
+
+        self._channel = channel
+        self._channel_name = channel_name or f"{address} {channel}"
+        # Availability and channel value at the last state write
+        self._written: tuple[bool, object] | None = None
+
+    @property
+    def name(self) -> str:
+        """Return the name of the sensor."""
+        return f"{self._channel_name} {self._suffix}"
+
+    @property
+    def unique_id(self) -> str:
+        """Return a unique, Home Assistant friendly identifier for this entity."""
+        # Output and dimmer modules share addresses, keep the module type
+        return (
+            f"{self.coordinator.module_type} {self._address} {self._channel} "
+            f"{self._suffix.replace(' ', '_')}"
+        )
+
+    def _channel_key(self) -> tuple[bool, object]:
+        module = (self.coordinator.data or {}).get(self._address)
+        return (
+            self.available,
+            None if module is None else module.states[self._channel],
+        )
+
+    async def async_added_to_hass(self) -> None:
+        """Remember the channel value of the initial state."""
+        await super().async_added_to_hass()
+        self._written = self._channel_key()
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write the state when this channel changed."""
+        key = self._channel_key()
+        if key == self._written:
+            return
+        self._written = key
+        super()._handle_coordinator_update()
+
+    def _value(self) -> float:
+        return self.coordinator.usage.get(self._address, self._channel)[
+            self._statistic
+        ]
+
+
+class PhcOnTimeSensor(PhcUsageSensor):
+    """Hours the channel has been on."""
+
+    _attr_device_class = SensorDeviceClass.DURATION
+    _attr_native_unit_of_measurement = UnitOfTime.HOURS
+    _attr_suggested_display_precision = 2
+    _statistic = ON_TIME
+    _suffix = "on time"
+
+    @property
+    def native_value(self) -> float:
+        """Return the on time in hours."""
+        return self._value() / 3600
+
+
+class PhcSwitchCountSensor(PhcUsageSensor):
+    """Number of times the channel was switched on or off."""
+
+    _statistic = SWITCH_COUNT
+    _suffix = "switch count"
+
+    @property
+    def native_value(self) -> int:
+        """Return the switch count."""
+        return int(self._value())
+
+
+class PhcWeightedOnTimeSensor(PhcOnTimeSensor):
+    """Hours at full brightness equivalent to the dimmer's on time."""
+
+    _attr_entity_registry_enabled_default = False
+    _statistic = WEIGHTED_ON_TIME
+    _suffix = "full brightness time"
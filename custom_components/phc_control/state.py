@@ -0,0 +1,77 @@
+"""Versioned copy-on-write store for module states."""
+from __future__ import annotations
+
+import itertools
+import threading
+from types import MappingProxyType
+from typing import Any, Mapping
+
+
+class PHCStateStore:
+    """Hold the latest state of every module of one class.
+
+    The store publishes immutable snapshots (address -> state). Writers build
+    a new snapshot under a lock and swap it in, so readers never lock and
+    never see a partially applied update. State objects are never modified
+    after they have been published.
+
+    Every channel write is tagged with a monotonic version. A poll records
+    the version before it starts; channels written after that are newer
+    than the poll result and keep their written value when it is merged.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counter = itertools.count(1)
+        self._version = 0
+        self._channel_versions: dict[tuple[int, int], int] = {}
+        self._snapshot: Mapping[int, Any] = MappingProxyType({})
+
+    @property
+    def snapshot(self) -> Mapping[int, Any]:
+        """Return the current read-only snapshot."""
+        return self._snapshot
+
+    @property
+    def version(self) -> int:
+        """Return the version of the latest write."""
+        return self._version
+
+    def _next_version(self) -> int:
+        self._version = next(self._counter)
+        return self._version
+
+    def set_channel(self, address: int, channel: int, value: Any) -> int:
+        """Atomically set one channel and return the version of the write."""
+        with self._lock:
+            state = self._snapshot.get(address)
+            if state is None:
+                return self._version
+
+            states = list(state.states)
+            states[channel] = value
+            version = self._next_version()
+            self._channel_versions[(address, channel)] = version
+            self._snapshot = MappingProxyType(
+                {**self._snapshot, address: type(state)(states=states)}
+            )
+            return version
+
+    def merge(self, results: Mapping[int, Any], since: int) -> Mapping[int, Any]:
+        """Merge polled module states that were requested at version since.
+
+        Channels written after since keep their newer value.
+        """
+        with self._lock:
+            snapshot = dict(self._snapshot)
+            for address, state in results.items():
+                current = snapshot.get(address)
+                states = list(state.states)
+                if current is not None:
+                    for channel in range(min(len(states), len(current.states))):
+                        if self._channel_versions.get((address, channel), 0) > since:
+                            states[channel] = current.states[channel]
+                snapshot[address] = type(state)(states=states)
+            self._next_version()
+            self._snapshot = MappingProxyType(snapshot)
+            return self._snapshot
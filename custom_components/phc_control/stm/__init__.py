@@ -0,0 +1,8 @@
+"""Client for the PHC STM, usable without Home Assistant.
+
+Nothing in this package may import Home Assistant or the integration
+modules around it, so the command line tools can run from this directory:
+
+    cd custom_components/phc_control
+    python -m stm.probe --host 192.168.1.10 project
+"""
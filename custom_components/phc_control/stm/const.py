@@ -0,0 +1,35 @@
+"""Protocol constants and module states."""
+
+from dataclasses import dataclass
+
+# Longest timed on that fits the 16 bit output timer, in seconds
+MAX_TIMED_DURATION = 0xFFFF // 10
+# Dimmer ramp time in seconds, sent as a single byte
+DEFAULT_RAMP_TIME = 3
+MAX_RAMP_TIME = 255
+
+
+@dataclass
+class OutputState:
+    """State of output module."""
+
+    states: list[bool]
+
+
+@dataclass
+class DimmerState:
+    """State of output module."""
+
+    states: list[int]
+
+
+SHUTTER_STOPPED = 0
+SHUTTER_OPENING = 1
+SHUTTER_CLOSING = 2
+
+
+@dataclass
+class ShutterState:
+    """State of shutter module, one SHUTTER_* motion value per channel."""
+
+    states: list[int]
@@ -0,0 +1,863 @@
+from __future__ import annotations
+
+import base64
+import json
+import logging
+import re
+import threading
+import time
+from collections.abc import Callable
+from typing import TYPE_CHECKING, Any
+from dataclasses import dataclass
+
+import xml.etree.ElementTree as ET
+
+# requests, zipfile, concurrent.futures and the recorder are imported where
+# they are used, most of them only run while the project is downloaded.
+if TYPE_CHECKING:
+    from aiohttp.client import ClientSession
+
+    from .replay import TelegramRecorder
+
+from .const import (
+    DEFAULT_RAMP_TIME,
+    MAX_RAMP_TIME,
+    MAX_TIMED_DURATION,
+    SHUTTER_CLOSING,
+    SHUTTER_OPENING,
+    SHUTTER_STOPPED,
+    DimmerState,
+    OutputState,
+    ShutterState,
+)
+from .telegram import (
+    DIMMER_BASE,
+    OUTPUT_BASE,
+    PHCException,
+    RequestError,
+    TelegramFault,
+    decode_response,
+    encode_call,
+    encode_telegram,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+OUTPUT_MODULE_COUNT = 32
+DIMMER_MODULE_COUNT = 16
+PROBE_CONCURRENCY = 8
+PROBE_TIMEOUT = 0.5
+# Seconds a module discovery result is reused from disk
+DISCOVERY_CACHE_TTL = 24 * 3600
+READ_CHUNK_SIZE = 32768
+# Timeout of one readFile chunk and of the whole project download, in
+# seconds; module discovery takes over when the project takes longer
+PROJECT_CHUNK_TIMEOUT = 30
+PROJECT_TIMEOUT = 120
+# An STM that does not answer the first chunk quickly is not serving the
+# project, fall back to discovery instead of waiting for the full budget
+PROJECT_FIRST_CHUNK_TIMEOUT = 5
+STATUS_COMMAND = 1
+# Seconds a module status read is reused by other callers
+STATUS_TTL = 1.0
+# Command codes are interpreted per module type: 6 switches an output (AMD)
+# channel on with a timer and moves a shutter (JRM) channel down. Both take
+# the time like _send_timed_command sends it.
+OUTPUT_ON_TIMED = 6
+
+
+class DisabledError(PHCException):
+    """Base error for python-homewizard-energy."""
+
+
+@dataclass
+class OutputDeviceDescription:
+    type: str
+    address: int
+    channels: dict[int, str]
+
+
+@dataclass
+class ShutterChannel:
+    name: str
+    runtime: int
+
+
+@dataclass
+class ShutterDeviceDescription:
+    type: str
+    address: int
+    channels: dict[int, ShutterChannel]
+
+
+class _Flight:
+    """A status read that other callers can wait for."""
+
+    def __init__(self) -> None:
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: Exception | None = None
+
+
+class PHCGateway:
+    _close_session: bool = False
+    _request_timeout: int = 10
+    _cached_output_modules: list[OutputDeviceDescription]
+    _cached_dimmer_modules: list[OutputDeviceDescription]
+    _cached_shutter_modules: list[ShutterDeviceDescription]
+
+    def __init__(
+        self,
+        host,
+        clientsession: ClientSession = None,
+        timeout: int = 10,
+        transport: Callable[[str], str] | None = None,
+        port: int = 6680,
+        capabilities: dict[str, Any] | None = None,
+        status_ttl: float = STATUS_TTL,
+    ) -> None:
+        self._host = host
+        self._port = port
+        self._transport = transport
+        self._recorder: TelegramRecorder | None = None
+        self._session = clientsession
+        self._request_timeout = timeout
+        self._cached_output_modules = None
+        self._cached_dimmer_modules = None
+        self._cached_shutter_modules = None
+        self._downloaded = False
+        self.status_ttl = status_ttl
+        self._status_lock = threading.Lock()
+        self._status_cache: dict[int, tuple[float, Any]] = {}
+        self._status_generation: dict[int, int] = {}
+        self._inflight: dict[int, _Flight] = {}
+        self._cache_hits = 0
+        self._cache_shared = 0
+        self._cache_misses = 0
+        self.supports_multicall = False
+        self.read_chunk_size = READ_CHUNK_SIZE
+        self.max_concurrency: int | None = None
+        if capabilities:
+            self.apply_capabilities(capabilities)
+
+    @property
+    def host(self) -> str:
+        """Return the hostname of the device.
+
+        Returns:
+            host: The used host
+
+        """
+        return self._host
+
+    def _post(self, body: str, timeout: float | None = 1500) -> str:
+        """Send an XML-RPC request to the STM and return the response text."""
+        start = time.monotonic()
+        if self._transport is not None:
+            text = self._transport(body)
+        else:
+            import requests
+
+            text = requests.post(
+                f"http://{self._host}:{self._port}/", body, timeout=timeout
+            ).text
+
+        # stop_recording may run on another thread, read the recorder once
+        recorder = self._recorder
+        if recorder is not None:
+            recorder.record(body, text, time.monotonic() - start)
+        return text
+
+    def start_recording(self, filename: str) -> None:
+        """Record all telegrams sent to the STM into filename."""
+        from .replay import TelegramRecorder
+
+        self.stop_recording()
+        self._recorder = TelegramRecorder(filename)
+
+    def stop_recording(self) -> None:
+        """Stop recording telegrams and close the recording file."""
+        if self._recorder is not None:
+            self._recorder.close()
+            self._recorder = None
+
+    @property
+    def cache_stats(self) -> dict[str, Any]:
+        """Return how status reads were served.
+
+        hits came from the TTL cache, shared joined a read already in
+        flight and misses sent a telegram.
+        """
+        total = self._cache_hits + self._cache_shared + self._cache_misses
+        return {
+            "hits": self._cache_hits,
+            "shared": self._cache_shared,
+            "misses": self._cache_misses,
+            "hit_rate": (self._cache_hits + self._cache_shared) / total
+            if total
+            else 0.0,
+        }
+
+    def _invalidate_status(self, module_address: int) -> None:
+        """Forget the cached status of a module after a command."""
+        with self._status_lock:
+            self._status_cache.pop(module_address, None)
+            self._status_generation[module_address] = (
+                self._status_generation.get(module_address, 0) + 1
+            )
+
+    def _store_status(self, module_address: int, generation: int, status) -> None:
+        """Cache a status unless a command was sent since it was requested."""
+        if self._status_generation.get(module_address, 0) == generation:
+            self._status_cache[module_address] = (time.monotonic(), status)
+
+    def _lookup_status(
+        self, module_address: int
+    ) -> tuple[tuple[float, Any] | None, _Flight | None, int | None]:
+        """Find a module status in the cache or a read in flight.
+
+        Returns the cache entry on a hit. Otherwise returns the flight to
+        wait for, with the generation set when the caller must do the read.
+        Must be called with the status lock held.
+        """
+        cached = self._status_cache.get(module_address)
+        if cached and time.monotonic() - cached[0] < self.status_ttl:
+            self._cache_hits += 1
+            return cached, None, None
+
+        flight = self._inflight.get(module_address)
+        if flight is not None:
+            self._cache_shared += 1
+            return None, flight, None
+
+        flight = self._inflight[module_address] = _Flight()
+        self._cache_misses += 1
+        return None, flight, self._status_generation.get(module_address, 0)
+
+    def _read_statuses(
+        self, base: int, addresses: list[int], parse: Callable[[list], Any]
+    ) -> dict[int, Any]:
+        """Read several module statuses through the TTL cache.
+
+        Cached modules are served from the cache and modules already being
+        read join that read; only the remaining modules are sent, as one
+        batch. Returns the state or exception of each address.
+        """
+        statuses: dict[int, Any] = {}
+        joined: dict[int, _Flight] = {}
+        batch: list[tuple[int, _Flight, int]] = []
+        with self._status_lock:
+            for addr in addresses:
+                cached, flight, generation = self._lookup_status(base + addr)
+                if cached is not None:
+                    statuses[addr] = cached[1]
+                elif generation is None:
+                    joined[addr] = flight
+                else:
+                    batch.append((addr, flight, generation))
+
+        if batch:
+            results: list = []
+            try:
+                results = self.send_telegrams(
+                    [(base + addr, 0, STATUS_COMMAND) for addr, _, _ in batch]
+                )
+            except Exception as err:
+                results = [err] * len(batch)
+                raise
+            finally:
+                with self._status_lock:
+                    for (addr, flight, generation), result in zip(batch, results):
+                        if not isinstance(result, Exception):
+                            try:
+                                result = parse(result[0])
+                            except Exception as err:  # pylint: disable=broad-except
+                                result = err
+                        if isinstance(result, Exception):
+                            flight.error = result
+                        else:
+                            flight.result = result
+                            self._store_status(base + addr, generation, result)
+                        del self._inflight[base + addr]
+                        statuses[addr] = result
+                for _, flight, _ in batch:
+                    flight.event.set()
+
+        for addr, flight in joined.items():
+            flight.event.wait()
+            statuses[addr] = flight.error if flight.error is not None else flight.result
+        return {addr: statuses[addr] for addr in addresses}
+
+    def _read_status(self, module_address: int, read: Callable[[], Any]) -> Any:
+        """Read a module status through the TTL cache.
+
+        Concurrent callers for the same module share a single telegram.
+        """
+        with self._status_lock:
+            cached, flight, generation = self._lookup_status(module_address)
+        if cached is not None:
+            return cached[1]
+        if generation is None:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = read()
+        except Exception as err:
+            flight.error = err
+            raise
+        finally:
+            with self._status_lock:
+                del self._inflight[module_address]
+                if flight.error is None:
+                    self._store_status(module_address, generation, flight.result)
+            flight.event.set()
+        return flight.result
+
+    def send_telegram(
+        self,
+        module_address: int,
+        channel: int,
+        command: int,
+        *args: int,
+        timeout: float | None = 1500,
+    ) -> list:
+        """Send a telegram to a module and return the decoded response data."""
+        if command != STATUS_COMMAND or channel:
+            self._invalidate_status(module_address)
+        return decode_response(
+            self._post(
+                encode_telegram(module_address, channel, command, *args),
+                timeout=timeout,
+            )
+        )
+
+    def send_telegrams(self, telegrams: list[tuple]) -> list:
+        """Send several telegrams and return their response data or exception.
+
+        Each telegram is a (module_address, channel, command, *args) tuple.
+
+        Uses a single system.multicall request when the STM supports it.
+        """
+        if not self.supports_multicall:
+            results = []
+            for telegram in telegrams:
+                try:
+                    results.append(self.send_telegram(*telegram))
+                except Exception as err:  # pylint: disable=broad-except
+                    results.append(err)
+            return results
+
+        calls = [
+            {
+                "methodName": "service.stm.sendTelegram",
+                "params": [0, module_address, channel * 32 + command, *args],
+            }
+            for module_address, channel, command, *args in telegrams
+        ]
+        responses = decode_response(
+            self._post(encode_call("system.multicall", [calls]))
+        )[0]
+        return [
+            TelegramFault(response.get("faultCode", 0), response.get("faultString", ""))
+            if isinstance(response, dict)
+            else response
+            for response in responses
+        ]
+
+    def apply_capabilities(self, capabilities: dict[str, Any]) -> None:
+        """Use the transport settings found by probe_capabilities."""
+        self.supports_multicall = capabilities.get("multicall", False)
+        self.read_chunk_size = capabilities.get("chunk_size", READ_CHUNK_SIZE)
+        self.max_concurrency = capabilities.get("concurrency")
+
+    def _find_probe_address(self) -> int | None:
+        """Return the bus address of a module that answers, or None.
+
+        Uses the loaded modules when there are any, otherwise the output
+        and dimmer address ranges are probed with short timeouts.
+        """
+        for modules, base in (
+            (self._cached_output_modules, OUTPUT_BASE),
+            (self._cached_dimmer_modules, DIMMER_BASE),
+        ):
+            for module in modules or []:
+                if module.channels:
+                    return base + module.address
+
+        from concurrent.futures import ThreadPoolExecutor
+
+        def answers(module_address: int) -> bool:
+            try:
+                self._post(
+                    encode_telegram(module_address, 0, STATUS_COMMAND),
+                    timeout=PROBE_TIMEOUT,
+                )
+            except Exception:  # pylint: disable=broad-except
+                return False
+            return True
+
+        candidates = [OUTPUT_BASE + addr for addr in range(OUTPUT_MODULE_COUNT)] + [
+            DIMMER_BASE + addr for addr in range(DIMMER_MODULE_COUNT)
+        ]
+        with ThreadPoolExecutor(PROBE_CONCURRENCY) as executor:
+            for module_address, ok in zip(
+                candidates, executor.map(answers, candidates)
+            ):
+                if ok:
+                    return module_address
+        return None
+
+    def probe_capabilities(self, samples: int = 10) -> dict[str, Any]:
+        """Measure what the STM supports.
+
+        Returns reachability, the median round trip time, multicall support,
+        the readFile chunk size, the sequential telegram rate and the number
+        of parallel requests worth sending. The round trip time is measured
+        with system.listMethods, the telegram rates against a module that
+        answers; without one they are None and a single request is used.
+        Raises RequestError when the STM cannot be reached.
+        """
+        try:
+            methods = decode_response(
+                self._post(encode_call("system.listMethods"), timeout=PROBE_TIMEOUT * 10)
+            )[0]
+        except TelegramFault:
+            methods = []
+        except Exception as err:
+            raise RequestError(f"Unable to reach STM at {self._host}: {err}") from err
+
+        def timed(body: str) -> float | None:
+            start = time.monotonic()
+            try:
+                self._post(body, timeout=PROBE_TIMEOUT * 10)
+            except Exception:  # pylint: disable=broad-except
+                return None
+            return time.monotonic() - start
+
+        rtts = sorted(
+            rtt
+            for rtt in (timed(encode_call("system.listMethods")) for _ in range(samples))
+            if rtt is not None
+        )
+        if not rtts:
+            raise RequestError(f"STM at {self._host} stopped answering")
+
+        rate = None
+        concurrency = 1
+        module_address = self._find_probe_address()
+        if module_address is not None:
+            telegram = encode_telegram(module_address, 0, STATUS_COMMAND)
+            telegram_rtts = [
+                rtt
+                for rtt in (timed(telegram) for _ in range(samples))
+                if rtt is not None
+            ]
+            if telegram_rtts:
+                rate = len(telegram_rtts) / max(sum(telegram_rtts), 1e-6)
+
+                from concurrent.futures import ThreadPoolExecutor
+
+                start = time.monotonic()
+                with ThreadPoolExecutor(PROBE_CONCURRENCY) as executor:
+                    answered = sum(
+                        1
+                        for rtt in executor.map(timed, [telegram] * samples)
+                        if rtt is not None
+                    )
+                parallel_rate = answered / max(time.monotonic() - start, 1e-6)
+                if parallel_rate > 1.5 * rate:
+                    concurrency = PROBE_CONCURRENCY
+
+        def chunk_length(index: int) -> int:
+            chunk = decode_response(
+                self._post(
+                    encode_call("service.stm.readFile", (0, index, 1)),
+                    timeout=PROJECT_CHUNK_TIMEOUT,
+                )
+            )[0][-1]
+            return len(base64.b64decode(chunk) if isinstance(chunk, str) else chunk)
+
+        # A first chunk shorter than the STM's chunk size is the whole file,
+        # only a second chunk proves that the first one was full
+        chunk_size = READ_CHUNK_SIZE
+        try:
+            first = chunk_length(0)
+            if first and chunk_length(1):
+                chunk_size = first
+        except Exception:  # pylint: disable=broad-except
+            pass
+
+        return {
+            "reachable": True,
+            "rtt": round(rtts[len(rtts) // 2], 4),
+            "multicall": "system.multicall" in methods,
+            "chunk_size": chunk_size,
+            "telegram_rate": None if rate is None else round(rate, 1),
+            "concurrency": concurrency,
+        }
+
+    @staticmethod
+    def _parse_output_status(values: list) -> OutputState:
+        status = values[-1]
+
+        res = [True] * 8
+        for addr in range(0, 8):
+            res[addr] = status & pow(2, addr) > 0
+
+        state = OutputState(states=res)
+        return state
+
+    def get_output_status(self, address, timeout: float | None = 1500) -> OutputState:
+        return self._read_status(
+            OUTPUT_BASE + address,
+            lambda: self._parse_output_status(
+                self.send_telegram(
+                    OUTPUT_BASE + address, 0, STATUS_COMMAND, timeout=timeout
+                )[0]
+            ),
+        )
+
+    def get_output_statuses(self, addresses: list[int]) -> dict[int, Any]:
+        """Read several output modules, returning the state or exception."""
+        return self._read_statuses(OUTPUT_BASE, addresses, self._parse_output_status)
+
+    @staticmethod
+    def decode_shutter_state(state: OutputState) -> ShutterState:
+        """Decode the relays of a JRM module into per channel motion.
+
+        Relay n switches the motor of channel n, relay n + 4 selects the
+        direction (on is lowering).
+        """
+        relays = state.states
+        res = [SHUTTER_STOPPED] * 4
+        for cha in range(0, 4):
+            if relays[cha]:
+                res[cha] = SHUTTER_CLOSING if relays[cha + 4] else SHUTTER_OPENING
+
+        return ShutterState(states=res)
+
+    def get_shutter_status(self, address, timeout: float | None = 1500) -> ShutterState:
+        return self.decode_shutter_state(self.get_output_status(address, timeout))
+
+    def turn_output_on(self, address: int, channel: int) -> None:
+        """Turn channel on."""
+        return self.output_command(address, channel, 2)
+        return None
+
+    def turn_output_off(self, address: int, channel: int) -> None:
+        """Turn channel off."""
+        return self.output_command(address, channel, 3)
+        return None
+
+    def turn_output_on_timed(self, address: int, channel: int, duration: int) -> None:
+        """Turn channel on for duration seconds; the module switches it off."""
+        if not 1 <= duration <= MAX_TIMED_DURATION:
+            raise ValueError(
+                f"Timed on duration must be 1-{MAX_TIMED_DURATION}s, got {duration}"
+            )
+        self._send_timed_command(address, channel, OUTPUT_ON_TIMED, duration)
+        return None
+
+    def output_command(self, address: int, channel: int, command: int) -> None:
+        """Send command for channel to PHC."""
+        self.send_telegram(OUTPUT_BASE + address, channel, command)
+        return None
+
+    def get_project(self) -> str:
+        """download project file"""
+        filename = f'/tmp/phc_{self._host.replace(".", "_")}.zip'
+        dirname = f'/tmp/phc_{self._host.replace(".", "_")}'
+
+        if self._downloaded:
+            return dirname
+
+        deadline = time.monotonic() + PROJECT_TIMEOUT
+        with open(filename, "wb") as result:
+            for i in range(0, 5):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise RequestError(
+                        f"Project download did not finish within {PROJECT_TIMEOUT}s"
+                    )
+                chunk_timeout = PROJECT_CHUNK_TIMEOUT if i else PROJECT_FIRST_CHUNK_TIMEOUT
+                try:
+                    chunk = decode_response(
+                        self._post(
+                            encode_call("service.stm.readFile", (0, i, 1)),
+                            timeout=min(chunk_timeout, remaining),
+                        )
+                    )[0][-1]
+                except TelegramFault:
+                    # A full last chunk is followed by a read past the end
+                    # of the file, which the STM may answer with a fault
+                    if not i:
+                        raise
+                    break
+                # Decode the chunk ourselves when it is not tagged as <base64>
+                decode = base64.b64decode(chunk) if isinstance(chunk, str) else chunk
+                result.write(decode)
+                _LOGGER.debug("Read project chunk %s: %s bytes", i, len(decode))
+                if len(decode) < self.read_chunk_size:
+                    break
+
+        import zipfile
+
+        zip_ref = zipfile.ZipFile(filename, "r")
+        zip_ref.extractall(dirname)
+        zip_ref.close()
+
+        self._downloaded = True
+        return dirname
+
+    def _load_project(self) -> ET.Element | None:
+        """Return the parsed project, or None when it is not available."""
+        try:
+            dirname = self.get_project()
+            return ET.parse(f"{dirname}/project.ppfx").getroot()
+        except Exception as err:  # pylint: disable=broad-except
+            _LOGGER.warning("Unable to load PHC project, probing modules: %s", err)
+            return None
+
+    def _probe_module(self, status_method, address: int) -> bool:
+        """Return True when the module at address answers a status telegram."""
+        try:
+            status_method(address, timeout=PROBE_TIMEOUT)
+        except Exception:  # pylint: disable=broad-except
+            return False
+        return True
+
+    @staticmethod
+    def _load_discovery(cachename: str) -> dict[str, Any] | None:
+        """Return a cached discovery result that has not expired."""
+        try:
+            with open(cachename, encoding="utf-8") as cache:
+                found = json.load(cache)
+        except (OSError, ValueError):
+            return None
+        if (
+            not isinstance(found, dict)
+            or time.time() - found.get("time", 0) > DISCOVERY_CACHE_TTL
+            or not (found.get("output") or found.get("dimmer"))
+        ):
+            return None
+        return found
+
+    def discover_modules(self) -> None:
+        """Find modules by probing the output and dimmer address ranges.
+
+        Used when the project file cannot be read. Shutter (JRM) modules
+        share the output address range and cannot be told apart, so they
+        are reported as output modules. The result is cached on disk for
+        DISCOVERY_CACHE_TTL. Raises RequestError when no module answers.
+        """
+        cachename = f'/tmp/phc_{self._host.replace(".", "_")}_modules.json'
+        found = self._load_discovery(cachename)
+        if found is None:
+            from concurrent.futures import ThreadPoolExecutor
+
+            with ThreadPoolExecutor(PROBE_CONCURRENCY) as executor:
+                outputs = executor.map(
+                    lambda addr: self._probe_module(self.get_output_status, addr),
+                    range(OUTPUT_MODULE_COUNT),
+                )
+                dimmers = executor.map(
+                    lambda addr: self._probe_module(self.get_dimmer_status, addr),
+                    range(DIMMER_MODULE_COUNT),
+                )
+                found = {
+                    "time": time.time(),
+                    "output": [addr for addr, ok in enumerate(outputs) if ok],
+                    "dimmer": [addr for addr, ok in enumerate(dimmers) if ok],
+                }
+            if not (found["output"] or found["dimmer"]):
+                raise RequestError(f"No PHC module at {self._host} answered")
+            with open(cachename, "w", encoding="utf-8") as cache:
+                json.dump(found, cache)
+
+        self._cached_output_modules = [
+            OutputDeviceDescription(
+                type="Output",
+                address=addr,
+                channels={cha: f"Output {addr}.{cha}" for cha in range(8)},
+            )
+            for addr in found["output"]
+        ]
+        self._cached_dimmer_modules = [
+            OutputDeviceDescription(
+                type="Output",
+                address=addr,
+                channels={cha: f"Dimmer {addr}.{cha}" for cha in range(2)},
+            )
+            for addr in found["dimmer"]
+        ]
+        self._cached_shutter_modules = []
+
+    def get_output_modules(self) -> list[OutputDeviceDescription]:
+        if not self._cached_output_modules is None:
+            return self._cached_output_modules
+
+        project = self._load_project()
+        if project is None:
+            self.discover_modules()
+            return self._cached_output_modules
+
+        res = list[OutputDeviceDescription]()
+        for mod in project.findall("./STM/MODS[@grp='Ausgangsmodule']/MOD"):
+            channels = {}
+            if mod.attrib["name"].startswith("AMD230"):
+                for cha in mod.findall("./CHAS[@grp='Ausgang']/CHA[@visu='true']"):
+                    channels[int(cha.attrib["adr"])] = cha.text.strip().split("(")[0]
+            dev = OutputDeviceDescription(
+                type="Output", address=int(mod.attrib["adr"]), channels=channels
+            )
+            res.append(dev)
+
+        self._cached_output_modules = res
+        return res
+
+    def get_shutter_modules(self) -> list[ShutterDeviceDescription]:
+        if not self._cached_shutter_modules is None:
+            return self._cached_shutter_modules
+
+        project = self._load_project()
+        if project is None:
+            self.discover_modules()
+            return self._cached_shutter_modules
+
+        res = list[ShutterDeviceDescription]()
+        for mod in project.findall("./STM/MODS[@grp='Ausgangsmodule']/MOD"):
+            channels = {}
+            if mod.attrib["name"].startswith("JRM"):
+                for cha in mod.findall("./CHAS[@grp='Ausgang']/CHA[@visu='true']"):
+                    runtimematches = re.findall("#([0-9]+)s", cha.text)
+                    channels[int(cha.attrib["adr"])] = ShutterChannel(
+                        name=cha.text.strip().split("(")[0],
+                        runtime=int(runtimematches[0]) if runtimematches else 90,
+                    )
+
+            dev = ShutterDeviceDescription(
+                type="Shutter",
+                address=int(mod.attrib["adr"]),
+                channels=channels,
+            )
+            res.append(dev)
+
+        self._cached_shutter_modules = res
+        return res
+
+    def get_dimmer_modules(self):
+        if not self._cached_dimmer_modules is None:
+            return self._cached_dimmer_modules
+
+        project = self._load_project()
+        if project is None:
+            self.discover_modules()
+            return self._cached_dimmer_modules
+
+        res = list[OutputDeviceDescription]()
+        for mod in project.findall("./STM/MODS[@grp='Dimmermodule']/MOD"):
+            channels = {}
+            if mod.attrib["name"].startswith("DIM_AB"):
+                for cha in mod.findall("./CHAS[@grp='Ausgang']/CHA[@visu='true']"):
+                    channels[int(cha.attrib["adr"])] = cha.text.strip().split("(")[0]
+            dev = OutputDeviceDescription(
+                type="Output",
+                address=int(mod.attrib["adr"]),
+                channels=channels,
+            )
+            res.append(dev)
+
+        self._cached_dimmer_modules = res
+        return res
+
+    def parse_dimmer_status(self, text: str) -> DimmerState:
+        return self._parse_dimmer_values(decode_response(text)[0])
+
+    @staticmethod
+    def _parse_dimmer_values(values: list) -> DimmerState:
+        values = values[4:6]
+        res = [int] * 2
+        for addr in range(0, 2):
+            res[addr] = int(values[addr])
+
+        state = OutputState(states=res)
+        return state
+
+    def get_dimmer_status(self, module, timeout: float | None = 1500) -> DimmerState:
+        return self._read_status(
+            DIMMER_BASE + module,
+            lambda: self.parse_dimmer_status(
+                self._post(
+                    encode_telegram(DIMMER_BASE + module, 0, STATUS_COMMAND),
+                    timeout=timeout,
+                )
+            ),
+        )
+
+    def get_dimmer_statuses(self, modules: list[int]) -> dict[int, Any]:
+        """Read several dimmer modules, returning the state or exception."""
+        return self._read_statuses(DIMMER_BASE, modules, self._parse_dimmer_values)
+
+    def turn_dimmer_on(self, address: int, channel: int) -> None:
+        """Turn channel on."""
+        return self.dimmer_command(address, channel, 12)
+
+    def turn_dimmer_set(
+        self,
+        address: int,
+        channel: int,
+        brightness: int,
+        ramptime: int = DEFAULT_RAMP_TIME,
+    ) -> None:
+        """Dim channel to brightness, ramping over ramptime seconds (0-255)."""
+        ramptime = max(0, min(MAX_RAMP_TIME, ramptime))
+        self.send_telegram(DIMMER_BASE + address, channel, 22, brightness, ramptime)
+        return None
+
+    def turn_dimmer_off(self, address: int, channel: int) -> None:
+        """Turn channel off."""
+        return self.dimmer_command(address, channel, 4)
+
+    def dimmer_command(self, address: int, channel: int, command: int) -> None:
+        """Send command for channel to PHC."""
+        self.send_telegram(DIMMER_BASE + address, channel, command)
+        return None
+
+    def stop_shutter(self, address: int, channel: int) -> None:
+        """Send command for channel to PHC."""
+        return self.output_command(address, channel, command=2)
+
+    def _send_timed_command(
+        self, address: int, channel: int, command: int, seconds: int
+    ) -> None:
+        """Send an output module command with a time in tenths of a second.
+
+        The time follows a 1 as low and high byte.
+        """
+        ticks = seconds * 10
+        if not 0 <= ticks <= 0xFFFF:
+            raise ValueError(f"Time of {seconds}s does not fit the 16 bit timer")
+        self.send_telegram(
+            OUTPUT_BASE + address, channel, command, 1, ticks % 256, ticks // 256
+        )
+
+    def open_shutter(self, address: int, channel: int, runtime: int) -> None:
+        """Send command for channel to PHC."""
+        command = 5  # SwitchOnRaising
+        self._send_timed_command(address, channel, command, runtime)
+        return None
+
+    def close_shutter(self, address: int, channel: int, runtime: int) -> None:
+        """Send command for channel to PHC."""
+        command = 6  # SwitchOnLowering
+        self._send_timed_command(address, channel, command, runtime)
+        return None
+
+    async def close(self):
+        """Close client session."""
+        _LOGGER.debug("Closing clientsession")
+        if self._session and self._close_session:
+            await self._session.close()
@@ -0,0 +1,196 @@
+"""Command line load generator and bus throughput probe for a PHC STM.
+
+Runs without Home Assistant; start it from custom_components/phc_control
+so the integration package is not imported:
+
+    python -m stm.probe --host 192.168.1.10 project
+    python -m stm.probe --host 192.168.1.10 poll --seconds 60
+    python -m stm.probe --host 192.168.1.10 storm \\
+        --target output:3:0 --target dimmer:1:1 --count 200 --concurrency 4
+    python -m stm.probe --replay stm.telegrams.gz --speed 0 poll
+"""
+from __future__ import annotations
+
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import itertools
+import math
+import threading
+import time
+
+from .phcgateway import PHCGateway
+from .replay import ReplayTransport
+
+
+class ProbeStats:
+    """Collect round trip times and errors of telegrams."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.rtts: list[float] = []
+        self.errors = 0
+        self.start = time.monotonic()
+
+    def run(self, func, *args) -> None:
+        """Call func and record its duration or failure."""
+        start = time.monotonic()
+        try:
+            func(*args)
+        except Exception:  # pylint: disable=broad-except
+            with self._lock:
+                self.errors += 1
+            return
+        with self._lock:
+            self.rtts.append(time.monotonic() - start)
+
+    def percentile(self, pct: float) -> float:
+        """Return the RTT percentile in seconds."""
+        rtts = sorted(self.rtts)
+        if not rtts:
+            return math.nan
+        return rtts[min(len(rtts) - 1, math.ceil(pct / 100 * len(rtts)) - 1)]
+
+    def report(self, title: str) -> str:
+        """Return a human readable summary."""
+        elapsed = time.monotonic() - self.start
+        total = len(self.rtts) + self.errors
+        lines = [
+            f"{title}: {total} telegrams in {elapsed:.1f}s "
+            f"({total / elapsed if elapsed else 0:.1f} telegrams/s)",
+            f"  errors: {self.errors} ({100 * self.errors / total if total else 0:.1f}%)",
+        ]
+        if self.rtts:
+            lines.append(
+                "  rtt ms: "
+                + " ".join(
+                    f"p{pct}={1000 * self.percentile(pct):.1f}"
+                    for pct in (50, 90, 95, 99)
+                )
+                + f" max={1000 * max(self.rtts):.1f}"
+            )
+        return "\n".join(lines)
+
+
+def summarize_project(gateway: PHCGateway) -> None:
+    """Download the project and print the modules and channels."""
+    start = time.monotonic()
+    outputs = gateway.get_output_modules()
+    dimmers = gateway.get_dimmer_modules()
+    shutters = gateway.get_shutter_modules()
+    print(f"project loaded in {time.monotonic() - start:.2f}s")
+
+    for title, modules in (
+        ("output", outputs),
+        ("dimmer", dimmers),
+        ("shutter", shutters),
+    ):
+        modules = [module for module in modules if module.channels]
+        channels = sum(len(module.channels) for module in modules)
+        print(f"{title}: {len(modules)} modules, {channels} channels")
+        for module in modules:
+            print(f"  {module.address}: {len(module.channels)} channels")
+
+
+def poll(gateway: PHCGateway, seconds: float, concurrency: int) -> ProbeStats:
+    """Poll all output and dimmer modules in a loop."""
+    calls = [
+        (gateway.get_output_status, module.address)
+        for module in gateway.get_output_modules()
+        if module.channels
+    ] + [
+        (gateway.get_dimmer_status, module.address)
+        for module in gateway.get_dimmer_modules()
+        if module.channels
+    ]
+    stats = ProbeStats()
+    if not calls:
+        return stats
+
+    deadline = time.monotonic() + seconds
+    with ThreadPoolExecutor(concurrency) as executor:
+        while time.monotonic() < deadline:
+            list(executor.map(lambda call: stats.run(*call), calls))
+    return stats
+
+
+def storm(
+    gateway: PHCGateway, targets: list[str], count: int, concurrency: int
+) -> ProbeStats:
+    """Toggle the target channels count times."""
+    commands = []
+    for target in targets:
+        kind, address, channel = target.split(":")
+        if kind == "output":
+            commands.append((gateway.turn_output_on, int(address), int(channel)))
+            commands.append((gateway.turn_output_off, int(address), int(channel)))
+        elif kind == "dimmer":
+            commands.append((gateway.turn_dimmer_on, int(address), int(channel)))
+            commands.append((gateway.turn_dimmer_off, int(address), int(channel)))
+        else:
+            raise ValueError(f"Unknown target type: {kind}")
+
+    stats = ProbeStats()
+    with ThreadPoolExecutor(concurrency) as executor:
+        list(
+            executor.map(
+                lambda call: stats.run(*call),
+                itertools.islice(itertools.cycle(commands), count),
+            )
+        )
+    return stats
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Run the probe."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", help="STM host or simulator")
+    parser.add_argument("--port", type=int, default=6680)
+    parser.add_argument("--replay", help="answer from a telegram recording")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed")
+    parser.add_argument(
+        "--status-ttl",
+        type=float,
+        default=0,
+        help="seconds to reuse status reads (0 sends every read to the bus)",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("project", help="download and summarize the project")
+
+    poll_parser = commands.add_parser("poll", help="poll all modules in a loop")
+    poll_parser.add_argument("--seconds", type=float, default=30)
+    poll_parser.add_argument("--concurrency", type=int, default=1)
+
+    storm_parser = commands.add_parser("storm", help="send a command storm")
+    storm_parser.add_argument(
+        "--target",
+        action="append",
+        required=True,
+        help="output:ADDRESS:CHANNEL or dimmer:ADDRESS:CHANNEL",
+    )
+    storm_parser.add_argument("--count", type=int, default=100)
+    storm_parser.add_argument("--concurrency", type=int, default=1)
+
+    args = parser.parse_args(argv)
+    if args.host is None and args.replay is None:
+        parser.error("--host is required unless --replay is given")
+    gateway = PHCGateway(
+        args.host or "replay",
+        port=args.port,
+        transport=ReplayTransport(args.replay, args.speed) if args.replay else None,
+        status_ttl=args.status_ttl,
+    )
+
+    if args.command == "project":
+        summarize_project(gateway)
+    elif args.command == "poll":
+        print(poll(gateway, args.seconds, args.concurrency).report("poll"))
+        print(f"  status cache: {gateway.cache_stats}")
+    elif args.command == "storm":
+        print(
+            storm(gateway, args.target, args.count, args.concurrency).report("storm")
+        )
+
+
+if __name__ == "__main__":
+    main()
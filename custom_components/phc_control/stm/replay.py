@@ -0,0 +1,82 @@
+"""Record and replay STM telegram traffic."""
+from __future__ import annotations
+
+from collections import deque
+import gzip
+import json
+import threading
+import time
+
+
+class ReplayMissError(LookupError):
+    """Request was not found in the recording."""
+
+
+class TelegramRecorder:
+    """Append request/response pairs to a gzip compressed JSON lines file.
+
+    Each line holds the offset since the start of the recording (t), the
+    round trip time (d), the request body (q) and the response body (r).
+    """
+
+    def __init__(self, filename: str) -> None:
+        self._file = gzip.open(filename, "wt", encoding="utf-8")
+        self._lock = threading.Lock()
+        self._start = time.monotonic()
+
+    def record(self, request: str, response: str, duration: float) -> None:
+        """Write a single telegram exchange."""
+        line = json.dumps(
+            {
+                "t": round(time.monotonic() - self._start - duration, 4),
+                "d": round(duration, 4),
+                "q": request,
+                "r": response,
+            },
+            separators=(",", ":"),
+        )
+        with self._lock:
+            if not self._file.closed:
+                self._file.write(line + "\n")
+
+    def close(self) -> None:
+        """Flush and close the recording."""
+        with self._lock:
+            self._file.close()
+
+
+def load_recording(filename: str) -> list[dict]:
+    """Load all exchanges from a recording file."""
+    with gzip.open(filename, "rt", encoding="utf-8") as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+class ReplayTransport:
+    """Answer gateway requests from a recording.
+
+    Responses for identical requests are returned in recorded order and
+    wrap around when exhausted, so a short recording can drive a long
+    benchmark. The recorded round trip time is reproduced divided by
+    speed; a speed of 0 answers immediately.
+    """
+
+    def __init__(self, filename: str, speed: float = 1.0) -> None:
+        self.speed = speed
+        self.entries = load_recording(filename)
+        self._responses: dict[str, deque[dict]] = {}
+        self._lock = threading.Lock()
+        for entry in self.entries:
+            self._responses.setdefault(entry["q"], deque()).append(entry)
+
+    def __call__(self, body: str) -> str:
+        """Return the recorded response for body."""
+        with self._lock:
+            responses = self._responses.get(body)
+            if not responses:
+                raise ReplayMissError(f"No recorded response for request: {body}")
+            entry = responses[0]
+            responses.rotate(-1)
+
+        if self.speed > 0:
+            time.sleep(entry["d"] / self.speed)
+        return entry["r"]
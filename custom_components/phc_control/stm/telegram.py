@@ -0,0 +1,166 @@
+"""XML-RPC codec for STM telegrams."""
+from __future__ import annotations
+
+import base64
+from functools import lru_cache
+import math
+import re
+from typing import Any
+from xml.sax.saxutils import escape
+import xml.etree.ElementTree as ET
+
+XML_HEADER = '<?xml version="1.0" encoding="UTF-8"?>'
+
+OUTPUT_BASE = 0x40
+DIMMER_BASE = 0xA0
+
+# <i4> is a signed 32 bit integer
+MIN_INT = -(2**31)
+MAX_INT = 2**31 - 1
+# Characters outside the XML 1.0 Char production cannot be sent at all
+_INVALID_XML_CHARS = re.compile(
+    "[^\t\n\r\u0020-\ud7ff\ue000-\ufffd\U00010000-\U0010ffff]"
+)
+# XML parsers normalize a literal carriage return to a newline
+_ESCAPE_ENTITIES = {"\r": "&#13;"}
+
+
+class PHCException(Exception):
+    """Base error for python-homewizard-energy."""
+
+
+class RequestError(PHCException):
+    """Base error for python-homewizard-energy."""
+
+
+class TelegramFault(RequestError):
+    """STM answered with an XML-RPC fault."""
+
+    def __init__(self, code: int, message: str) -> None:
+        super().__init__(f"STM fault {code}: {message}")
+        self.code = code
+        self.message = message
+
+
+def _escape(text: str) -> str:
+    """Escape text for an XML element, rejecting what XML cannot carry."""
+    if _INVALID_XML_CHARS.search(text):
+        raise ValueError(f"Cannot encode {text!r} in XML")
+    return escape(text, _ESCAPE_ENTITIES)
+
+
+def encode_value(value: Any) -> str:
+    """Serialize a python value as an XML-RPC <value>.
+
+    Raises OverflowError for integers outside the <i4> range and ValueError
+    for NaN, infinity and strings with characters XML 1.0 does not allow.
+    Tuples decode as lists, bytearrays as bytes and struct names as str.
+    """
+    if isinstance(value, bool):
+        return f"<value><boolean>{int(value)}</boolean></value>"
+    if isinstance(value, int):
+        if not MIN_INT <= value <= MAX_INT:
+            raise OverflowError(f"{value} does not fit an XML-RPC <i4>")
+        return f"<value><i4>{value}</i4></value>"
+    if isinstance(value, float):
+        if not math.isfinite(value):
+            raise ValueError(f"XML-RPC has no representation for {value}")
+        return f"<value><double>{value!r}</double></value>"
+    if isinstance(value, str):
+        return f"<value><string>{_escape(value)}</string></value>"
+    if isinstance(value, (bytes, bytearray)):
+        return f"<value><base64>{base64.b64encode(value).decode('ascii')}</base64></value>"
+    if isinstance(value, (list, tuple)):
+        items = "".join(encode_value(item) for item in value)
+        return f"<value><array><data>{items}</data></array></value>"
+    if isinstance(value, dict):
+        members = "".join(
+            f"<member><name>{_escape(str(name))}</name>{encode_value(item)}</member>"
+            for name, item in value.items()
+        )
+        return f"<value><struct>{members}</struct></value>"
+    raise TypeError(f"Cannot encode {type(value).__name__} as XML-RPC value")
+
+
+def encode_params(params) -> str:
+    """Serialize a sequence of parameters as <param> elements."""
+    return "".join(f"<param>{encode_value(param)}</param>" for param in params)
+
+
+def encode_call(method: str, params=()) -> str:
+    """Serialize a complete methodCall."""
+    return (
+        f"{XML_HEADER}<methodCall><methodName>{method}</methodName>"
+        f"<params>{encode_params(params)}</params></methodCall>"
+    )
+
+
+@lru_cache(maxsize=1024)
+def _telegram_prefix(module_address: int, channel: int, command: int) -> str:
+    """Return the serialized call up to and including the command byte."""
+    return (
+        f"{XML_HEADER}<methodCall><methodName>service.stm.sendTelegram</methodName>"
+        f"<params>{encode_params((0, module_address, channel * 32 + command))}"
+    )
+
+
+def encode_telegram(module_address: int, channel: int, command: int, *args) -> str:
+    """Serialize a sendTelegram call for module_address.
+
+    module_address is the bus address including the module class offset
+    (OUTPUT_BASE or DIMMER_BASE); args are appended as extra data bytes.
+    """
+    return (
+        f"{_telegram_prefix(module_address, channel, command)}"
+        f"{encode_params(args)}</params></methodCall>"
+    )
+
+
+def decode_value(element: ET.Element) -> Any:
+    """Convert an XML-RPC <value> element to a python value."""
+    if len(element) == 0:
+        return element.text or ""
+
+    child = element[0]
+    tag = child.tag
+    if tag in ("i4", "int"):
+        return int(child.text)
+    if tag == "boolean":
+        return child.text.strip() == "1"
+    if tag == "double":
+        return float(child.text)
+    if tag == "string":
+        return child.text or ""
+    if tag == "base64":
+        return base64.b64decode(child.text or "")
+    if tag == "array":
+        return [decode_value(item) for item in child.findall("./data/value")]
+    if tag == "struct":
+        return {
+            member.findtext("name"): decode_value(member.find("value"))
+            for member in child.findall("member")
+        }
+    if tag == "nil":
+        return None
+    return child.text
+
+
+def decode_call(text: str) -> tuple[str, list]:
+    """Parse a methodCall into its method name and parameters."""
+    root = ET.fromstring(text)
+    return root.findtext("methodName"), [
+        decode_value(value) for value in root.findall("./params/param/value")
+    ]
+
+
+def decode_response(text: str) -> list:
+    """Parse a methodResponse and return its parameters.
+
+    Raises TelegramFault when the STM returned a fault.
+    """
+    root = ET.fromstring(text)
+    fault = root.find("./fault/value")
+    if fault is not None:
+        fault = decode_value(fault)
+        raise TelegramFault(fault.get("faultCode", 0), fault.get("faultString", ""))
+    return [decode_value(value) for value in root.findall("./params/param/value")]
@@ -0,0 +1,109 @@
+"""Per channel usage statistics accumulated from state changes."""
+from __future__ import annotations
+
+from array import array
+import time
+from typing import Any, Mapping
+
+
+class UsageAccumulator:
+    """Accumulate on time, switch count and brightness weighted on time.
+
+    Every channel gets a fixed slot in a set of typed arrays, so memory per
+    channel is constant. Only modules whose state object changed since the
+    previous snapshot are inspected (published states are never modified
+    in place), so an update costs O(changed channels).
+    """
+
+    def __init__(self, scale: float = 1.0) -> None:
+        # Value of a fully on channel: 1 for outputs, 255 for dimmers
+        self._scale = scale
+        self._slots: dict[tuple[int, int], int] = {}
+        self._level = array("d")
+        self._since = array("d")
+        self._on_seconds = array("d")
+        self._weighted_seconds = array("d")
+        self._toggles = array("L")
+        self._seen: Mapping[int, Any] = {}
+
+    def _slot(self, address: int, channel: int) -> int:
+        slot = self._slots.get((address, channel))
+        if slot is None:
+            slot = self._slots[(address, channel)] = len(self._level)
+            self._level.append(-1.0)  # unknown until the first observation
+            self._since.append(0.0)
+            self._on_seconds.append(0.0)
+            self._weighted_seconds.append(0.0)
+            self._toggles.append(0)
+        return slot
+
+    def observe(
+        self, snapshot: Mapping[int, Any] | None, now: float | None = None
+    ) -> None:
+        """Account for the channels that changed in snapshot."""
+        if snapshot is None:
+            return
+        now = time.monotonic() if now is None else now
+        seen = self._seen
+        for address, state in snapshot.items():
+            if seen.get(address) is state:
+                continue
+            for channel, value in enumerate(state.states):
+                level = float(value) / self._scale
+                self._update(self._slot(address, channel), level, now)
+        self._seen = snapshot
+
+    def _update(self, slot: int, level: float, now: float) -> None:
+        previous = self._level[slot]
+        if previous == level:
+            return
+        if previous >= 0:
+            self._accumulate(slot, now)
+            if (previous > 0) != (level > 0):
+                self._toggles[slot] += 1
+        self._level[slot] = level
+        self._since[slot] = now
+
+    def _accumulate(self, slot: int, now: float) -> None:
+        level = self._level[slot]
+        if level > 0:
+            elapsed = now - self._since[slot]
+            self._on_seconds[slot] += elapsed
+            self._weighted_seconds[slot] += elapsed * level
+        self._since[slot] = now
+
+    def get(self, address: int, channel: int) -> tuple[float, int, float]:
+        """Return on seconds, switch count and brightness weighted seconds."""
+        slot = self._slots.get((address, channel))
+        if slot is None:
+            return 0.0, 0, 0.0
+        self._accumulate(slot, time.monotonic())
+        return (
+            self._on_seconds[slot],
+            self._toggles[slot],
+            self._weighted_seconds[slot],
+        )
+
+    def as_dict(self) -> dict[str, list]:
+        """Return the totals in a JSON serializable form."""
+        now = time.monotonic()
+        res = {}
+        for (address, channel), slot in self._slots.items():
+            self._accumulate(slot, now)
+            # Not rounded: a restored total below the last reported one
+            # would look like a meter reset to the statistics
+            res[f"{address}.{channel}"] = [
+                self._on_seconds[slot],
+                self._toggles[slot],
+                self._weighted_seconds[slot],
+            ]
+        return res
+
+    def restore(self, data: dict[str, list] | None) -> None:
+        """Load totals saved by as_dict."""
+        for key, (on_seconds, toggles, weighted_seconds) in (data or {}).items():
+            address, channel = (int(part) for part in key.split("."))
+            slot = self._slot(address, channel)
+            self._on_seconds[slot] = on_seconds
+            self._toggles[slot] = toggles
+            self._weighted_seconds[slot] = weighted_seconds
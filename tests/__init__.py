@@ -0,0 +1 @@
+"""Tests for the PHC Control integration."""
@@ -0,0 +1,72 @@
+"""Fixtures for the PHC Control tests."""
+from __future__ import annotations
+
+from collections.abc import AsyncGenerator, Generator
+import functools
+from unittest.mock import patch
+
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from homeassistant.const import CONF_HOST
+from homeassistant.core import HomeAssistant
+
+from custom_components.phc_control.const import CONF_CAPABILITIES, DOMAIN
+from custom_components.phc_control.stm.phcgateway import PHCGateway
+
+from .simulator import SimulatedSTM, build_project
+
+CAPABILITIES = {
+    "reachable": True,
+    "rtt": 0.01,
+    "multicall": False,
+    "chunk_size": 32768,
+    "telegram_rate": 100.0,
+    "concurrency": 1,
+}
+
+
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(enable_custom_integrations):
+    """Load the integration from custom_components."""
+    yield
+
+
+@pytest.fixture
+def stm() -> SimulatedSTM:
+    """Return a simulated STM with a few modules of every class."""
+    return SimulatedSTM(build_project(outputs=4, dimmers=2, shutters=2))
+
+
+@pytest.fixture
+def config_entry(hass: HomeAssistant) -> MockConfigEntry:
+    """Return a config entry for the simulated STM."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        unique_id="stm",
+        data={CONF_HOST: "stm", CONF_CAPABILITIES: CAPABILITIES},
+    )
+    entry.add_to_hass(hass)
+    return entry
+
+
+@pytest.fixture
+def mock_gateway(stm: SimulatedSTM) -> Generator[SimulatedSTM, None, None]:
+    """Make the integration talk to the simulated STM."""
+    with patch(
+        "custom_components.phc_control.PHCGateway",
+        functools.partial(PHCGateway, transport=stm),
+    ):
+        yield stm
+
+
+@pytest.fixture
+async def init_integration(
+    hass: HomeAssistant, config_entry: MockConfigEntry, mock_gateway: SimulatedSTM
+) -> AsyncGenerator[MockConfigEntry, None]:
+    """Set up the integration against the simulated STM."""
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    yield config_entry
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
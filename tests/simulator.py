@@ -0,0 +1,121 @@
+"""Simulated STM for the tests."""
+from __future__ import annotations
+
+import base64
+import io
+import zipfile
+
+from custom_components.phc_control.stm.telegram import (
+    DIMMER_BASE,
+    decode_call,
+    encode_value,
+)
+
+
+def build_project(outputs: int, dimmers: int, shutters: int) -> bytes:
+    """Return a zipped project.ppfx with the given number of modules."""
+
+    def channels(count: int, name: str) -> str:
+        return "".join(
+            f"<CHA adr='{cha}' visu='true'>{name} {cha} (#60s)</CHA>"
+            for cha in range(count)
+        )
+
+    mods = [
+        f"<MOD adr='{adr}' name='AMD230_{adr}'><CHAS grp='Ausgang'>"
+        f"{channels(8, 'Light')}</CHAS></MOD>"
+        for adr in range(outputs)
+    ] + [
+        f"<MOD adr='{outputs + adr}' name='JRM_{adr}'><CHAS grp='Ausgang'>"
+        f"{channels(4, 'Shutter')}</CHAS></MOD>"
+        for adr in range(shutters)
+    ]
+    dims = [
+        f"<MOD adr='{adr}' name='DIM_AB_{adr}'><CHAS grp='Ausgang'>"
+        f"{channels(2, 'Dimmer')}</CHAS></MOD>"
+        for adr in range(dimmers)
+    ]
+    project = (
+        "<PROJECT><STM>"
+        f"<MODS grp='Ausgangsmodule'>{''.join(mods)}</MODS>"
+        f"<MODS grp='Dimmermodule'>{''.join(dims)}</MODS>"
+        "</STM></PROJECT>"
+    )
+
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("project.ppfx", project)
+    return buffer.getvalue()
+
+
+class SimulatedSTM:
+    """Transport answering readFile and sendTelegram like an STM.
+
+    Without a project readFile answers with a fault, as do reads past the
+    end of the project. When addresses is given, telegrams to other bus
+    addresses time out like absent modules. With multicall,
+    system.multicall is listed and answered.
+    """
+
+    def __init__(
+        self,
+        project: bytes | None,
+        chunk_size: int = 32768,
+        addresses: set[int] | None = None,
+        multicall: bool = False,
+    ) -> None:
+        self._project = project
+        self._chunk_size = chunk_size
+        self._addresses = addresses
+        self._multicall = multicall
+        # Parameters of every telegram received, in order
+        self.telegrams: list[list] = []
+        # Relay status reported by output modules, by bus address
+        self.statuses: dict[int, int] = {}
+
+    def _respond(self, value) -> str:
+        return (
+            '<?xml version="1.0" encoding="UTF-8"?><methodResponse><params>'
+            f"<param>{encode_value(value)}</param></params></methodResponse>"
+        )
+
+    def _fault(self, message: str) -> str:
+        return (
+            '<?xml version="1.0" encoding="UTF-8"?><methodResponse><fault>'
+            f"{encode_value({'faultCode': 1, 'faultString': message})}"
+            "</fault></methodResponse>"
+        )
+
+    def _telegram(self, params: list) -> list:
+        """Return the answer of the addressed module."""
+        self.telegrams.append(params)
+        if self._addresses is not None and params[1] not in self._addresses:
+            raise TimeoutError(f"Module {params[1]:#x} does not answer")
+        if params[1] >= DIMMER_BASE:
+            return [0, params[1], 1, 0, 128, 0]
+        return [0, params[1], 1, self.statuses.get(params[1], 0b1010)]
+
+    def __call__(self, body: str) -> str:
+        method, params = decode_call(body)
+        if method == "service.stm.readFile":
+            if self._project is None:
+                return self._fault("No project")
+            start = params[1] * self._chunk_size
+            if params[1] and start >= len(self._project):
+                return self._fault("Read past end of file")
+            chunk = self._project[start : start + self._chunk_size]
+            return self._respond([0, base64.b64encode(chunk).decode("ascii")])
+        if method == "service.stm.sendTelegram":
+            return self._respond(self._telegram(params))
+        if method == "system.listMethods":
+            methods = ["service.stm.readFile", "service.stm.sendTelegram"]
+            return self._respond(methods + ["system.multicall"] * self._multicall)
+        if method == "system.multicall" and self._multicall:
+            results = []
+            for call in params[0]:
+                try:
+                    results.append([self._telegram(call["params"])])
+                except TimeoutError as err:
+                    results.append({"faultCode": 1, "faultString": str(err)})
+            return self._respond(results)
+        return self._fault(f"Unknown method {method}")
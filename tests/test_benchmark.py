@@ -0,0 +1,49 @@
+"""Import and setup time budget of the integration."""
+from __future__ import annotations
+
+import time
+
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.core import HomeAssistant
+
+from custom_components.phc_control.benchmark import (
+    DIMMERS,
+    IMPORT_BUDGET,
+    OUTPUTS,
+    SETUP_BUDGET,
+    SHUTTERS,
+    measure_import,
+)
+
+from .simulator import SimulatedSTM, build_project
+
+
+@pytest.fixture
+def stm() -> SimulatedSTM:
+    """Return a simulated STM the size of the reference installation."""
+    return SimulatedSTM(build_project(OUTPUTS, DIMMERS, SHUTTERS))
+
+
+def test_import_budget() -> None:
+    """The integration and its platforms import within the budget."""
+    assert measure_import() < IMPORT_BUDGET
+
+
+async def test_setup_budget(
+    hass: HomeAssistant, config_entry: MockConfigEntry, mock_gateway: SimulatedSTM
+) -> None:
+    """async_setup_entry with all platforms finishes within the budget."""
+    start = time.perf_counter()
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+    setup_time = time.perf_counter() - start
+
+    assert config_entry.state is ConfigEntryState.LOADED
+    assert len(hass.states.async_entity_ids("light")) == OUTPUTS * 8 + DIMMERS * 2
+    assert setup_time < SETUP_BUDGET
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
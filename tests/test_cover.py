@@ -0,0 +1,139 @@
+"""Tests for the PHC shutters."""
+from __future__ import annotations
+
+from datetime import timedelta
+
+from freezegun.api import FrozenDateTimeFactory
+import pytest
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_fire_time_changed,
+)
+
+from homeassistant.const import (
+    ATTR_ENTITY_ID,
+    STATE_CLOSED,
+    STATE_CLOSING,
+    STATE_OPEN,
+    STATE_OPENING,
+)
+from homeassistant.core import HomeAssistant
+
+from custom_components.phc_control import coordinator
+from custom_components.phc_control.const import (
+    DOMAIN,
+    MODULE_TYPE_OUTPUT,
+    MODULE_TYPE_SHUTTER,
+    OUTPUT_SCAN_INTERVAL,
+    SHUTTER_MOVING_INTERVAL,
+)
+from custom_components.phc_control.stm.telegram import DIMMER_BASE, OUTPUT_BASE
+
+from .simulator import SimulatedSTM, build_project
+
+# The simulated project gives every shutter a runtime of 60 seconds
+COVER = "cover.phc_output_4_shutter_0"
+SHUTTER_MODULE = OUTPUT_BASE + 4
+# Relay 0 runs the motor of channel 0 upwards
+OPENING_RELAYS = 0b00000001
+
+
+@pytest.fixture
+def stm() -> SimulatedSTM:
+    """Return a simulated STM whose shutters are all stopped."""
+    stm = SimulatedSTM(build_project(outputs=4, dimmers=2, shutters=2))
+    stm.statuses = {SHUTTER_MODULE: 0, SHUTTER_MODULE + 1: 0}
+    return stm
+
+
+async def _async_tick(
+    hass: HomeAssistant, freezer: FrozenDateTimeFactory, seconds: float
+) -> None:
+    freezer.tick(timedelta(seconds=seconds))
+    async_fire_time_changed(hass)
+    await hass.async_block_till_done()
+
+
+async def test_expected_stop(
+    hass: HomeAssistant,
+    freezer: FrozenDateTimeFactory,
+    monkeypatch: pytest.MonkeyPatch,
+    init_integration: MockConfigEntry,
+) -> None:
+    """A move is marked stopped after the runtime of the latest command."""
+    # Only the runtime timer may end the move
+    monkeypatch.setattr(coordinator, "SHUTTER_MOVING_INTERVAL", None)
+    await hass.services.async_call(
+        "cover", "close_cover", {ATTR_ENTITY_ID: COVER}, blocking=True
+    )
+    await _async_tick(hass, freezer, 30)
+
+    # Stop and close again, the timer of the first move must not end it
+    await hass.services.async_call(
+        "cover", "stop_cover", {ATTR_ENTITY_ID: COVER}, blocking=True
+    )
+    await hass.services.async_call(
+        "cover", "close_cover", {ATTR_ENTITY_ID: COVER}, blocking=True
+    )
+    await hass.async_block_till_done()
+    assert hass.states.get(COVER).state == STATE_CLOSING
+
+    await _async_tick(hass, freezer, 31)
+    assert hass.states.get(COVER).state == STATE_CLOSING
+
+    await _async_tick(hass, freezer, 30)
+    assert hass.states.get(COVER).state == STATE_CLOSED
+
+
+async def test_stop_cancels_expected_stop(
+    hass: HomeAssistant, init_integration: MockConfigEntry
+) -> None:
+    """Stopping a move cancels its timer."""
+    await hass.services.async_call(
+        "cover", "open_cover", {ATTR_ENTITY_ID: COVER}, blocking=True
+    )
+    await hass.async_block_till_done()
+    assert hass.states.get(COVER).state == STATE_OPENING
+    entity = hass.data["cover"].get_entity(COVER)
+    assert entity._stop_unsub is not None
+
+    await hass.services.async_call(
+        "cover", "stop_cover", {ATTR_ENTITY_ID: COVER}, blocking=True
+    )
+    await hass.async_block_till_done()
+    assert entity._stop_unsub is None
+
+
+async def test_polled_motion(
+    hass: HomeAssistant,
+    freezer: FrozenDateTimeFactory,
+    init_integration: MockConfigEntry,
+    stm: SimulatedSTM,
+) -> None:
+    """A move from a wall switch is read with the outputs and followed.
+
+    The move gets the runtime timer, and the shutters are polled on their
+    own until it stops.
+    """
+    coordinators = hass.data[DOMAIN][init_integration.entry_id + "_coordinators"]
+    shutters = coordinators[MODULE_TYPE_SHUTTER]
+    entity = hass.data["cover"].get_entity(COVER)
+    hass.data[DOMAIN][init_integration.entry_id + "_gateway"].status_ttl = 0
+    stm.statuses[SHUTTER_MODULE] = OPENING_RELAYS
+    stm.telegrams.clear()
+
+    # The output poll reads the shutter modules in the same batch
+    await _async_tick(hass, freezer, OUTPUT_SCAN_INTERVAL.total_seconds())
+    polled = [params[1] for params in stm.telegrams if params[1] < DIMMER_BASE]
+    assert sorted(polled) == [OUTPUT_BASE + address for address in range(6)]
+    assert coordinators[MODULE_TYPE_OUTPUT].update_interval == OUTPUT_SCAN_INTERVAL
+    assert hass.states.get(COVER).state == STATE_OPENING
+    assert shutters.update_interval == SHUTTER_MOVING_INTERVAL
+    assert entity._stop_unsub is not None
+
+    # Polled again soon, until the module reports the move stopped
+    stm.statuses[SHUTTER_MODULE] = 0
+    await _async_tick(hass, freezer, SHUTTER_MOVING_INTERVAL.total_seconds())
+    assert hass.states.get(COVER).state == STATE_OPEN
+    assert shutters.update_interval is None
+    assert entity._stop_unsub is None
@@ -0,0 +1,25 @@
+"""Tests for the PHC diagnostics."""
+from __future__ import annotations
+
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.phc_control.const import CONF_CAPABILITIES, MODULE_TYPE_OUTPUT
+from custom_components.phc_control.diagnostics import (
+    async_get_config_entry_diagnostics,
+)
+
+
+async def test_diagnostics(
+    hass: HomeAssistant, init_integration: MockConfigEntry
+) -> None:
+    """The diagnostics report the capabilities and the status cache use."""
+    diagnostics = await async_get_config_entry_diagnostics(hass, init_integration)
+
+    assert diagnostics["capabilities"] == init_integration.data[CONF_CAPABILITIES]
+    assert diagnostics["status_cache"]["misses"] > 0
+    assert 0 <= diagnostics["status_cache"]["hit_rate"] <= 1
+    output = diagnostics["coordinators"][MODULE_TYPE_OUTPUT]
+    assert output["last_update_success"]
+    assert output["unavailable_modules"] == []
@@ -0,0 +1,96 @@
+"""Tests for module discovery when the project cannot be read."""
+from __future__ import annotations
+
+import json
+import os
+import time
+
+import pytest
+
+from custom_components.phc_control.stm import phcgateway
+from custom_components.phc_control.stm.phcgateway import PHCGateway, RequestError
+from custom_components.phc_control.stm.telegram import DIMMER_BASE, OUTPUT_BASE
+
+from .simulator import SimulatedSTM
+
+
+@pytest.fixture
+def cachename():
+    """Return the discovery cache file of host discovery, removed after the test."""
+    filename = "/tmp/phc_discovery_modules.json"
+    if os.path.exists(filename):
+        os.remove(filename)
+    yield filename
+    if os.path.exists(filename):
+        os.remove(filename)
+
+
+def test_discover_modules(cachename) -> None:
+    """Modules that answer are found and cached."""
+    stm = SimulatedSTM(None, addresses={OUTPUT_BASE + 3, DIMMER_BASE + 1})
+    gateway = PHCGateway("discovery", transport=stm)
+
+    assert [module.address for module in gateway.get_output_modules()] == [3]
+    assert [module.address for module in gateway.get_dimmer_modules()] == [1]
+    assert gateway.get_shutter_modules() == []
+    with open(cachename, encoding="utf-8") as cache:
+        assert json.load(cache)["output"] == [3]
+
+
+def test_nothing_answers(cachename) -> None:
+    """An unreachable STM raises and caches nothing."""
+    gateway = PHCGateway("discovery", transport=SimulatedSTM(None, addresses=set()))
+
+    with pytest.raises(RequestError):
+        gateway.get_output_modules()
+    assert not os.path.exists(cachename)
+
+    # Retried once the modules answer
+    gateway._transport = SimulatedSTM(None, addresses={OUTPUT_BASE})
+    assert [module.address for module in gateway.get_output_modules()] == [0]
+
+
+def test_cache_expires(cachename) -> None:
+    """An expired discovery result is probed again."""
+    with open(cachename, "w", encoding="utf-8") as cache:
+        json.dump(
+            {
+                "time": time.time() - phcgateway.DISCOVERY_CACHE_TTL - 1,
+                "output": [5],
+                "dimmer": [],
+            },
+            cache,
+        )
+    stm = SimulatedSTM(None, addresses={OUTPUT_BASE + 2})
+    gateway = PHCGateway("discovery", transport=stm)
+
+    assert [module.address for module in gateway.get_output_modules()] == [2]
+
+
+def test_project_timeout(monkeypatch, stm) -> None:
+    """A project download over its time budget falls back to discovery."""
+    monkeypatch.setattr(phcgateway, "PROJECT_TIMEOUT", 0)
+    gateway = PHCGateway("stm", transport=stm)
+
+    with pytest.raises(RequestError):
+        gateway.get_project()
+
+
+def test_project_first_chunk_timeout(monkeypatch, stm) -> None:
+    """The first project chunk gets a short timeout, later chunks the full one."""
+    stm._chunk_size = 256
+    gateway = PHCGateway("stm", transport=stm)
+    gateway.read_chunk_size = 256
+    timeouts = []
+    post = gateway._post
+
+    def timed_post(body: str, timeout: float | None = 1500) -> str:
+        timeouts.append(timeout)
+        return post(body, timeout)
+
+    monkeypatch.setattr(gateway, "_post", timed_post)
+    gateway.get_project()
+
+    assert timeouts[0] == phcgateway.PROJECT_FIRST_CHUNK_TIMEOUT
+    assert len(timeouts) > 1
+    assert all(timeout == phcgateway.PROJECT_CHUNK_TIMEOUT for timeout in timeouts[1:])
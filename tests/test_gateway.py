@@ -0,0 +1,247 @@
+"""Tests for the STM gateway."""
+from __future__ import annotations
+
+import io
+import os
+import threading
+import zipfile
+
+import pytest
+
+from custom_components.phc_control.stm.const import (
+    SHUTTER_CLOSING,
+    SHUTTER_OPENING,
+    SHUTTER_STOPPED,
+    OutputState,
+)
+from custom_components.phc_control.stm.phcgateway import (
+    READ_CHUNK_SIZE,
+    PHCGateway,
+    RequestError,
+)
+from custom_components.phc_control.stm.telegram import DIMMER_BASE, OUTPUT_BASE
+
+from .simulator import SimulatedSTM, build_project
+
+
+@pytest.mark.parametrize(
+    ("relays", "motion"),
+    [
+        (0b00000000, [SHUTTER_STOPPED] * 4),
+        # Direction relays alone do not move anything
+        (0b11110000, [SHUTTER_STOPPED] * 4),
+        (0b00000001, [SHUTTER_OPENING] + [SHUTTER_STOPPED] * 3),
+        (0b00010001, [SHUTTER_CLOSING] + [SHUTTER_STOPPED] * 3),
+        (
+            0b01001100,
+            [SHUTTER_STOPPED, SHUTTER_STOPPED, SHUTTER_CLOSING, SHUTTER_OPENING],
+        ),
+    ],
+)
+def test_decode_shutter_state(relays: int, motion: list[int]) -> None:
+    """Motor relays 0-3 run the channels, relays 4-7 select lowering."""
+    state = OutputState(states=[bool(relays & 1 << relay) for relay in range(8)])
+
+    assert PHCGateway.decode_shutter_state(state).states == motion
+
+
+def test_probe_capabilities() -> None:
+    """Capabilities of an STM with multicall support."""
+    stm = SimulatedSTM(build_project(1, 1, 0), multicall=True)
+    capabilities = PHCGateway("stm", transport=stm).probe_capabilities()
+
+    assert capabilities["reachable"]
+    assert capabilities["multicall"]
+    assert capabilities["chunk_size"] == 32768
+    assert capabilities["telegram_rate"] > 0
+
+
+@pytest.mark.parametrize(
+    ("stm_chunk_size", "project_size", "chunk_size"),
+    [
+        # The whole project fits in the first chunk
+        (65536, 41306, READ_CHUNK_SIZE),
+        (65536, 65536, READ_CHUNK_SIZE),
+        # A second chunk proves that the first one was full
+        (65536, 100000, 65536),
+        (16384, 41306, 16384),
+    ],
+)
+def test_probe_chunk_size(
+    stm_chunk_size: int, project_size: int, chunk_size: int
+) -> None:
+    """The chunk size is only taken from a chunk that is followed by another."""
+    stm = SimulatedSTM(os.urandom(project_size), chunk_size=stm_chunk_size)
+    capabilities = PHCGateway("stm", transport=stm).probe_capabilities()
+
+    assert capabilities["chunk_size"] == chunk_size
+
+
+@pytest.mark.parametrize("project_size", [41306, 65536, 100000])
+def test_project_download_chunks(project_size: int) -> None:
+    """The project downloads completely with the probed chunk size."""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr("padding", os.urandom(project_size))
+    project = buffer.getvalue()
+    stm = SimulatedSTM(project, chunk_size=65536)
+    gateway = PHCGateway("chunks", transport=stm)
+    gateway.apply_capabilities(gateway.probe_capabilities())
+
+    with open(f"{gateway.get_project()}.zip", "rb") as download:
+        assert download.read() == project
+
+
+def test_probe_capabilities_without_module_zero() -> None:
+    """The telegram rate is measured against a module that answers."""
+    sent = []
+    stm = SimulatedSTM(None, addresses={DIMMER_BASE + 3})
+
+    def transport(body: str) -> str:
+        sent.append(body)
+        return stm(body)
+
+    capabilities = PHCGateway("stm", transport=transport).probe_capabilities()
+
+    assert capabilities["telegram_rate"] > 0
+    assert not capabilities["multicall"]
+    rate_telegrams = [body for body in sent if f"<i4>{DIMMER_BASE + 3}</i4>" in body]
+    assert len(rate_telegrams) > 10
+
+
+def test_probe_capabilities_without_modules() -> None:
+    """An STM without answering modules can still be added."""
+    stm = SimulatedSTM(None, addresses=set())
+    capabilities = PHCGateway("stm", transport=stm).probe_capabilities()
+
+    assert capabilities["telegram_rate"] is None
+    assert capabilities["concurrency"] == 1
+
+
+def test_probe_capabilities_unreachable() -> None:
+    """An STM that does not answer raises RequestError."""
+
+    def transport(body: str) -> str:
+        raise ConnectionError("unreachable")
+
+    with pytest.raises(RequestError):
+        PHCGateway("stm", transport=transport).probe_capabilities()
+
+
+def test_multicall_statuses() -> None:
+    """Batched reads return the state or exception of every module."""
+    stm = SimulatedSTM(None, addresses={OUTPUT_BASE + 1}, multicall=True)
+    gateway = PHCGateway("stm", transport=stm, capabilities={"multicall": True})
+
+    statuses = gateway.get_output_statuses([1, 2])
+
+    assert statuses[1].states == [False, True, False, True] + [False] * 4
+    assert isinstance(statuses[2], Exception)
+
+
+def test_read_status_shares_reads() -> None:
+    """Concurrent reads of a module send one telegram."""
+    stm = SimulatedSTM(None)
+    gateway = PHCGateway("stm", transport=stm)
+    started = threading.Event()
+    release = threading.Event()
+
+    def read() -> str:
+        started.set()
+        release.wait(5)
+        return gateway.send_telegram(OUTPUT_BASE, 0, 1)
+
+    leader = threading.Thread(target=gateway._read_status, args=(OUTPUT_BASE, read))
+    leader.start()
+    started.wait(5)
+    follower = threading.Thread(target=gateway.get_output_status, args=(0,))
+    follower.start()
+    release.set()
+    leader.join(5)
+    follower.join(5)
+
+    assert len(stm.telegrams) == 1
+    assert gateway.cache_stats["misses"] == 1
+    assert gateway.cache_stats["shared"] == 1
+
+
+def test_read_status_invalidated_by_command() -> None:
+    """A command on a module drops its cached status."""
+    stm = SimulatedSTM(None)
+    gateway = PHCGateway("stm", transport=stm)
+
+    gateway.get_output_status(0)
+    gateway.get_output_status(0)
+    assert len(stm.telegrams) == 1
+
+    gateway.turn_output_on(0, 1)
+    gateway.get_output_status(0)
+    assert len(stm.telegrams) == 3
+    assert gateway.cache_stats == {
+        "hits": 1,
+        "shared": 0,
+        "misses": 2,
+        "hit_rate": 1 / 3,
+    }
+
+
+def test_statuses_use_cache() -> None:
+    """Batched reads only send the modules that are not cached."""
+    stm = SimulatedSTM(None, multicall=True)
+    gateway = PHCGateway("stm", transport=stm, capabilities={"multicall": True})
+
+    gateway.get_output_status(1)
+    gateway.get_dimmer_status(0)
+    statuses = gateway.get_output_statuses([0, 1])
+    gateway.get_dimmer_statuses([0])
+
+    assert [params[1] for params in stm.telegrams] == [
+        OUTPUT_BASE + 1,
+        DIMMER_BASE,
+        OUTPUT_BASE,
+    ]
+    assert statuses[0] == statuses[1]
+    assert gateway.cache_stats["hits"] == 2
+
+
+def test_statuses_join_read_in_flight() -> None:
+    """A batched read waits for a read of the same module in flight."""
+    stm = SimulatedSTM(None, multicall=True)
+    gateway = PHCGateway("stm", transport=stm, capabilities={"multicall": True})
+    started = threading.Event()
+    release = threading.Event()
+
+    def read():
+        started.set()
+        release.wait(5)
+        return gateway._parse_output_status(gateway.send_telegram(OUTPUT_BASE, 0, 1)[0])
+
+    leader = threading.Thread(target=gateway._read_status, args=(OUTPUT_BASE, read))
+    leader.start()
+    started.wait(5)
+    statuses = {}
+    batch = threading.Thread(
+        target=lambda: statuses.update(gateway.get_output_statuses([0, 1]))
+    )
+    batch.start()
+    release.set()
+    leader.join(5)
+    batch.join(5)
+
+    assert sorted(params[1] for params in stm.telegrams) == [
+        OUTPUT_BASE,
+        OUTPUT_BASE + 1,
+    ]
+    assert statuses[0].states == [False, True, False, True] + [False] * 4
+    assert gateway.cache_stats["shared"] == 1
+
+
+def test_statuses_release_failed_reads() -> None:
+    """A failed batched read is not cached and can be retried."""
+    stm = SimulatedSTM(None, addresses=set(), multicall=True)
+    gateway = PHCGateway("stm", transport=stm, capabilities={"multicall": True})
+
+    assert isinstance(gateway.get_output_statuses([0])[0], Exception)
+    stm._addresses = None
+    assert not isinstance(gateway.get_output_statuses([0])[0], Exception)
+    assert gateway.cache_stats["misses"] == 2
@@ -0,0 +1,196 @@
+"""Tests for the integration setup and services."""
+from __future__ import annotations
+
+import asyncio
+from datetime import timedelta
+import threading
+
+import pytest
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_fire_time_changed,
+)
+
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.const import ATTR_ENTITY_ID, CONF_ADDRESS, STATE_UNAVAILABLE
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import entity_registry as er
+import homeassistant.util.dt as dt_util
+
+from custom_components.phc_control.const import (
+    ATTR_MODULE_TYPE,
+    ATTR_SECONDS,
+    DIMMER_RETRY_INTERVAL,
+    DIMMER_SCAN_INTERVAL,
+    DOMAIN,
+    MODULE_TYPE_DIMMER,
+    MODULE_TYPE_OUTPUT,
+    OUTPUT_SCAN_INTERVAL,
+    SERVICE_RECORD,
+    SERVICE_REFRESH,
+)
+from custom_components.phc_control.stm.telegram import DIMMER_BASE, OUTPUT_BASE
+
+from .simulator import SimulatedSTM, build_project
+
+
+async def test_record_restart(
+    hass: HomeAssistant, init_integration: MockConfigEntry
+) -> None:
+    """A new recording is not stopped by the timer of the previous one."""
+    gateway = hass.data[DOMAIN][init_integration.entry_id + "_gateway"]
+
+    await hass.services.async_call(
+        DOMAIN, SERVICE_RECORD, {ATTR_SECONDS: 10}, blocking=True
+    )
+    await hass.services.async_call(
+        DOMAIN, SERVICE_RECORD, {ATTR_SECONDS: 100}, blocking=True
+    )
+
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=20))
+    await hass.async_block_till_done()
+    assert gateway._recorder is not None
+
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=120))
+    await hass.async_block_till_done()
+    assert gateway._recorder is None
+
+
+async def test_setup_retry_when_stm_unreachable(
+    hass: HomeAssistant, config_entry: MockConfigEntry, mock_gateway: SimulatedSTM
+) -> None:
+    """Setup is retried when neither the project nor any module answers."""
+    mock_gateway._project = None
+    mock_gateway._addresses = set()
+    await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    assert config_entry.state is ConfigEntryState.SETUP_RETRY
+
+
+async def test_setup_with_dead_module_class(
+    hass: HomeAssistant, config_entry: MockConfigEntry, mock_gateway: SimulatedSTM
+) -> None:
+    """Outputs and shutters load while every dimmer module is down."""
+    mock_gateway._addresses = {OUTPUT_BASE + address for address in range(6)}
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    assert config_entry.state is ConfigEntryState.LOADED
+    coordinators = hass.data[DOMAIN][config_entry.entry_id + "_coordinators"]
+    assert coordinators[MODULE_TYPE_DIMMER].update_interval == DIMMER_RETRY_INTERVAL
+    assert coordinators[MODULE_TYPE_OUTPUT].update_interval == OUTPUT_SCAN_INTERVAL
+    states = [state.state for state in hass.states.async_all("light")]
+    assert states.count(STATE_UNAVAILABLE) == 2 * 2
+    assert len(states) == 4 * 8 + 2 * 2
+    assert all(
+        state.state != STATE_UNAVAILABLE for state in hass.states.async_all("cover")
+    )
+
+    # The dimmers are polled again once they answer
+    mock_gateway._addresses = None
+    async_fire_time_changed(hass, dt_util.utcnow() + DIMMER_RETRY_INTERVAL)
+    await hass.async_block_till_done()
+    states = [state.state for state in hass.states.async_all("light")]
+    assert STATE_UNAVAILABLE not in states
+    assert coordinators[MODULE_TYPE_DIMMER].update_interval == DIMMER_SCAN_INTERVAL
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+
+async def test_setup_retry_when_no_module_answers(
+    hass: HomeAssistant, config_entry: MockConfigEntry, mock_gateway: SimulatedSTM
+) -> None:
+    """Setup is retried when the project loads but no module answers."""
+    mock_gateway._addresses = set()
+    await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    assert config_entry.state is ConfigEntryState.SETUP_RETRY
+
+
+@pytest.mark.parametrize(
+    ("data", "expected"),
+    [
+        ({ATTR_ENTITY_ID: "light.phc_output_1_light_0"}, [OUTPUT_BASE + 1]),
+        ({ATTR_ENTITY_ID: "light.phc_dimmer_1_dimmer_0"}, [DIMMER_BASE + 1]),
+        ({CONF_ADDRESS: [1]}, [OUTPUT_BASE + 1, DIMMER_BASE + 1]),
+        ({CONF_ADDRESS: [1], ATTR_MODULE_TYPE: "dimmer"}, [DIMMER_BASE + 1]),
+        ({ATTR_MODULE_TYPE: "shutter"}, [OUTPUT_BASE + 4, OUTPUT_BASE + 5]),
+    ],
+)
+async def test_refresh_selected_modules(
+    hass: HomeAssistant,
+    init_integration: MockConfigEntry,
+    mock_gateway: SimulatedSTM,
+    data: dict,
+    expected: list[int],
+) -> None:
+    """The refresh service only reads the selected modules."""
+    hass.data[DOMAIN][init_integration.entry_id + "_gateway"].status_ttl = 0
+    mock_gateway.telegrams.clear()
+
+    await hass.services.async_call(DOMAIN, SERVICE_REFRESH, data, blocking=True)
+
+    assert sorted(params[1] for params in mock_gateway.telegrams) == expected
+
+
+async def test_refresh_overlapping_calls(
+    hass: HomeAssistant,
+    init_integration: MockConfigEntry,
+    mock_gateway: SimulatedSTM,
+) -> None:
+    """A refresh requested during a poll of the same module shares that poll."""
+    hass.data[DOMAIN][init_integration.entry_id + "_gateway"].status_ttl = 0
+    mock_gateway.telegrams.clear()
+    started = threading.Event()
+    release = threading.Event()
+    telegram = mock_gateway._telegram
+
+    def slow_telegram(params: list) -> list:
+        started.set()
+        release.wait(5)
+        return telegram(params)
+
+    mock_gateway._telegram = slow_telegram
+    data = {ATTR_ENTITY_ID: "light.phc_output_1_light_0"}
+    first = hass.async_create_task(
+        hass.services.async_call(DOMAIN, SERVICE_REFRESH, data, blocking=True)
+    )
+    await hass.async_add_executor_job(started.wait, 5)
+    second = hass.async_create_task(
+        hass.services.async_call(DOMAIN, SERVICE_REFRESH, data, blocking=True)
+    )
+    # Let the second call reach the coordinator while the poll still runs
+    for _ in range(10):
+        await asyncio.sleep(0)
+    release.set()
+    await asyncio.gather(first, second)
+
+    assert [params[1] for params in mock_gateway.telegrams] == [OUTPUT_BASE + 1]
+
+
+async def test_migrate_dimmer_unique_ids(
+    hass: HomeAssistant, config_entry: MockConfigEntry, mock_gateway: SimulatedSTM
+) -> None:
+    """Dimmer lights keep their entity when their unique id gets the type."""
+    mock_gateway._project = build_project(outputs=1, dimmers=2, shutters=0)
+    registry = er.async_get(hass)
+    output = registry.async_get_or_create(
+        "light", DOMAIN, "0 0", config_entry=config_entry, suggested_object_id="hall"
+    )
+    dimmer = registry.async_get_or_create(
+        "light", DOMAIN, "1 0", config_entry=config_entry, suggested_object_id="desk"
+    )
+
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    assert registry.async_get(output.entity_id).unique_id == "0 0"
+    assert registry.async_get(dimmer.entity_id).unique_id == "dimmer 1 0"
+    assert hass.states.get(dimmer.entity_id) is not None
+    assert hass.states.get("light.phc_dimmer_1_dimmer_0") is None
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
@@ -0,0 +1,224 @@
+"""Tests for the PHC lights."""
+from __future__ import annotations
+
+from datetime import timedelta
+from types import SimpleNamespace
+
+import pytest
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_fire_time_changed,
+    mock_restore_cache,
+)
+import voluptuous as vol
+
+from homeassistant.components.light import ATTR_BRIGHTNESS, ATTR_TRANSITION
+from homeassistant.const import ATTR_ENTITY_ID, STATE_OFF, STATE_ON
+from homeassistant.core import HomeAssistant, State
+from homeassistant.exceptions import ServiceValidationError
+import homeassistant.util.dt as dt_util
+
+from custom_components.phc_control import light
+from custom_components.phc_control.const import (
+    ATTR_DURATION,
+    ATTR_TIMED_OFF_AT,
+    DOMAIN,
+    MODULE_TYPE_DIMMER,
+    SERVICE_TIMED_ON,
+)
+from custom_components.phc_control.stm.phcgateway import PHCGateway
+from custom_components.phc_control.stm.telegram import DIMMER_BASE, OUTPUT_BASE
+
+from .simulator import SimulatedSTM
+
+OUTPUT_LIGHT = "light.phc_output_0_light_0"
+DIMMER_LIGHT = "light.phc_dimmer_0_dimmer_0"
+
+
+async def test_timed_on(hass: HomeAssistant, init_integration: MockConfigEntry) -> None:
+    """A new timed on replaces the timer of the previous one."""
+    await hass.services.async_call(
+        DOMAIN,
+        SERVICE_TIMED_ON,
+        {ATTR_ENTITY_ID: OUTPUT_LIGHT, ATTR_DURATION: {"seconds": 10}},
+        blocking=True,
+    )
+    await hass.services.async_call(
+        DOMAIN,
+        SERVICE_TIMED_ON,
+        {ATTR_ENTITY_ID: OUTPUT_LIGHT, ATTR_DURATION: {"seconds": 60}},
+        blocking=True,
+    )
+    assert hass.states.get(OUTPUT_LIGHT).attributes[ATTR_TIMED_OFF_AT]
+
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=20))
+    await hass.async_block_till_done()
+    assert hass.states.get(OUTPUT_LIGHT).state == STATE_ON
+
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=70))
+    await hass.async_block_till_done()
+    state = hass.states.get(OUTPUT_LIGHT)
+    assert state.state == STATE_OFF
+    assert ATTR_TIMED_OFF_AT not in state.attributes
+
+
+async def test_timed_on_cancelled_by_turn_on(
+    hass: HomeAssistant, init_integration: MockConfigEntry
+) -> None:
+    """Switching the output by hand ends the timed on."""
+    await hass.services.async_call(
+        DOMAIN,
+        SERVICE_TIMED_ON,
+        {ATTR_ENTITY_ID: OUTPUT_LIGHT, ATTR_DURATION: {"seconds": 10}},
+        blocking=True,
+    )
+    await hass.services.async_call(
+        "light", "turn_on", {ATTR_ENTITY_ID: OUTPUT_LIGHT}, blocking=True
+    )
+    await hass.async_block_till_done()
+    assert ATTR_TIMED_OFF_AT not in hass.states.get(OUTPUT_LIGHT).attributes
+
+    async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=20))
+    await hass.async_block_till_done()
+    assert hass.states.get(OUTPUT_LIGHT).state == STATE_ON
+
+
+async def test_timed_on_dimmer(
+    hass: HomeAssistant, init_integration: MockConfigEntry
+) -> None:
+    """Dimmers reject timed on."""
+    with pytest.raises(ServiceValidationError):
+        await hass.services.async_call(
+            DOMAIN,
+            SERVICE_TIMED_ON,
+            {ATTR_ENTITY_ID: DIMMER_LIGHT, ATTR_DURATION: {"seconds": 10}},
+            blocking=True,
+        )
+
+
+@pytest.mark.parametrize("duration", [{"seconds": 0}, {"seconds": 0.5}, {"hours": 2}])
+async def test_timed_on_invalid_duration(
+    hass: HomeAssistant, init_integration: MockConfigEntry, duration: dict
+) -> None:
+    """Durations the output timer cannot run are rejected."""
+    with pytest.raises(vol.Invalid):
+        await hass.services.async_call(
+            DOMAIN,
+            SERVICE_TIMED_ON,
+            {ATTR_ENTITY_ID: OUTPUT_LIGHT, ATTR_DURATION: duration},
+            blocking=True,
+        )
+
+
+@pytest.mark.parametrize(("remaining", "expected"), [(60, True), (-60, False)])
+async def test_timed_on_restored(
+    hass: HomeAssistant,
+    config_entry: MockConfigEntry,
+    mock_gateway: SimulatedSTM,
+    remaining: int,
+    expected: bool,
+) -> None:
+    """A timed on that was running before a restart still expires."""
+    # The simulated module reports channel 1 of every output module on
+    entity_id = "light.phc_output_0_light_1"
+    timed_off_at = dt_util.utcnow() + timedelta(seconds=remaining)
+    mock_restore_cache(
+        hass,
+        [State(entity_id, STATE_ON, {ATTR_TIMED_OFF_AT: timed_off_at.isoformat()})],
+    )
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    state = hass.states.get(entity_id)
+    assert state.state == STATE_ON
+    assert (ATTR_TIMED_OFF_AT in state.attributes) is expected
+
+    async_fire_time_changed(hass, timed_off_at + timedelta(seconds=1))
+    await hass.async_block_till_done()
+    assert hass.states.get(entity_id).state == (STATE_OFF if expected else STATE_ON)
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+
+def test_timed_on_telegram() -> None:
+    """The gateway sends the time like the shutter moves and checks its range."""
+    stm = SimulatedSTM(None)
+    gateway = PHCGateway("stm", transport=stm)
+
+    gateway.turn_output_on_timed(0, 1, 6553)
+    assert stm.telegrams == [[0, OUTPUT_BASE, 32 + 6, 1, 0xFA, 0xFF]]
+    for duration in (0, 7000):
+        with pytest.raises(ValueError):
+            gateway.turn_output_on_timed(0, 1, duration)
+    assert len(stm.telegrams) == 1
+
+
+async def test_transition_restores_level(
+    hass: HomeAssistant, init_integration: MockConfigEntry, stm
+) -> None:
+    """turn_on with a transition ramps back to the previous level."""
+    assert hass.states.get(DIMMER_LIGHT).attributes[ATTR_BRIGHTNESS] == 128
+    await hass.services.async_call(
+        "light", "turn_off", {ATTR_ENTITY_ID: DIMMER_LIGHT}, blocking=True
+    )
+    await hass.async_block_till_done()
+    assert hass.states.get(DIMMER_LIGHT).state == STATE_OFF
+
+    await hass.services.async_call(
+        "light",
+        "turn_on",
+        {ATTR_ENTITY_ID: DIMMER_LIGHT, ATTR_TRANSITION: 2},
+        blocking=True,
+    )
+    # Dim to 128 with a 2 second ramp
+    assert stm.telegrams[-1] == [0, DIMMER_BASE, 22, 128, 2]
+    coordinators = hass.data[DOMAIN][init_integration.entry_id + "_coordinators"]
+    assert coordinators[MODULE_TYPE_DIMMER].data[0].states[0] == 128
+
+
+async def test_transition_unknown_level(
+    hass: HomeAssistant, init_integration: MockConfigEntry, stm
+) -> None:
+    """Without a known level the module restores it."""
+    light = "light.phc_dimmer_0_dimmer_1"
+    assert hass.states.get(light).state == STATE_OFF
+
+    await hass.services.async_call(
+        "light", "turn_on", {ATTR_ENTITY_ID: light, ATTR_TRANSITION: 2}, blocking=True
+    )
+    # Dimmer on command for channel 1
+    assert stm.telegrams[-1] == [0, DIMMER_BASE, 1 * 32 + 12]
+
+
+async def test_transition_interpolates_brightness(
+    hass: HomeAssistant,
+    init_integration: MockConfigEntry,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """The brightness follows the ramp and the ticks stop when it ends."""
+    clock = SimpleNamespace(now=1000.0)
+    clock.monotonic = lambda: clock.now
+    monkeypatch.setattr(light, "time", clock)
+
+    await hass.services.async_call(
+        "light", "turn_off", {ATTR_ENTITY_ID: DIMMER_LIGHT}, blocking=True
+    )
+    await hass.services.async_call(
+        "light",
+        "turn_on",
+        {ATTR_ENTITY_ID: DIMMER_LIGHT, ATTR_BRIGHTNESS: 200, ATTR_TRANSITION: 4},
+        blocking=True,
+    )
+    await hass.async_block_till_done()
+    entity = hass.data["light"].get_entity(DIMMER_LIGHT)
+    assert entity._ramp_unsub is not None
+
+    for seconds, brightness in ((1, 50), (2, 100), (5, 200)):
+        clock.now = 1000.0 + seconds
+        async_fire_time_changed(hass, dt_util.utcnow() + timedelta(seconds=seconds))
+        await hass.async_block_till_done()
+        assert hass.states.get(DIMMER_LIGHT).attributes[ATTR_BRIGHTNESS] == brightness
+
+    assert entity._ramp is None
+    assert entity._ramp_unsub is None
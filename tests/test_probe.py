@@ -0,0 +1,40 @@
+"""Tests for the command line probe."""
+from __future__ import annotations
+
+from pathlib import Path
+import subprocess
+import sys
+
+import custom_components.phc_control
+
+INTEGRATION_DIR = Path(custom_components.phc_control.__file__).parent
+
+
+def test_probe_runs_without_home_assistant() -> None:
+    """The probe only imports the stm package."""
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys, stm.probe; "
+            "print(sorted(name for name in sys.modules "
+            "if name.split('.')[0] in ('homeassistant', 'custom_components')))",
+        ],
+        cwd=INTEGRATION_DIR,
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    assert result.stdout.strip() == "[]"
+
+
+def test_probe_requires_host_or_replay() -> None:
+    """Either --host or --replay selects the STM."""
+    result = subprocess.run(
+        [sys.executable, "-m", "stm.probe", "project"],
+        cwd=INTEGRATION_DIR,
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 2
+    assert "--host is required unless --replay is given" in result.stderr
@@ -0,0 +1,62 @@
+"""Tests for the profile service."""
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.phc_control.stm.phcgateway import PHCGateway
+from custom_components.phc_control.profiler import PHCProfiler
+
+from .simulator import SimulatedSTM, build_project
+
+
+async def test_concurrent_gateway_calls(hass: HomeAssistant, stm) -> None:
+    """Gateway calls on parallel executor threads share one session profile."""
+
+    def slow_stm(body: str) -> str:
+        time.sleep(0.01)
+        return stm(body)
+
+    gateway = PHCGateway("stm", transport=slow_stm, status_ttl=0)
+    profiler = PHCProfiler(hass, [], gateway)
+    profiler.start()
+
+    results = await asyncio.gather(
+        *(
+            hass.async_add_executor_job(gateway.get_output_status, address)
+            for address in range(4)
+            for _ in range(4)
+        )
+    )
+    filename = await profiler.async_finish()
+
+    assert len(results) == 16
+    assert filename is not None
+    assert os.path.exists(filename)
+    assert "get_output_status" not in gateway.__dict__
+
+
+async def test_session_without_calls(hass: HomeAssistant, stm) -> None:
+    """A session without gateway calls writes no stats file."""
+    profiler = PHCProfiler(hass, [], PHCGateway("stm", transport=stm))
+    profiler.start()
+
+    assert profiler.active
+    assert await profiler.async_finish() is None
+    assert not profiler.active
+
+
+async def test_batched_calls(hass: HomeAssistant) -> None:
+    """Multicall reads are profiled."""
+    stm = SimulatedSTM(build_project(2, 2, 0), multicall=True)
+    gateway = PHCGateway("stm", transport=stm, capabilities={"multicall": True})
+    profiler = PHCProfiler(hass, [], gateway)
+    profiler.start()
+
+    await hass.async_add_executor_job(gateway.get_output_statuses, [0, 1])
+    await hass.async_add_executor_job(gateway.get_dimmer_statuses, [0, 1])
+
+    assert await profiler.async_finish() is not None
@@ -0,0 +1,28 @@
+"""Tests for telegram recording and replay."""
+from __future__ import annotations
+
+import pytest
+
+from custom_components.phc_control.stm.phcgateway import PHCGateway
+from custom_components.phc_control.stm.replay import (
+    ReplayMissError,
+    ReplayTransport,
+    load_recording,
+)
+
+
+def test_record_and_replay(tmp_path, stm) -> None:
+    """A recording answers the same requests without the STM."""
+    filename = str(tmp_path / "stm.telegrams.gz")
+    gateway = PHCGateway("stm", transport=stm, status_ttl=0)
+    gateway.start_recording(filename)
+    recorded = [gateway.get_output_status(0), gateway.get_dimmer_status(1)]
+    gateway.stop_recording()
+
+    assert len(load_recording(filename)) == 2
+
+    replay = PHCGateway("replay", transport=ReplayTransport(filename, speed=0))
+    assert [replay.get_output_status(0), replay.get_dimmer_status(1)] == recorded
+    with pytest.raises(ReplayMissError):
+        replay.get_output_status(3)
+
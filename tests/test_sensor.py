@@ -0,0 +1,105 @@
+"""Tests for the PHC usage statistics sensors."""
+from __future__ import annotations
+
+from datetime import timedelta
+from typing import Any
+
+from freezegun.api import FrozenDateTimeFactory
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_fire_time_changed,
+)
+
+from homeassistant.const import ATTR_ENTITY_ID, EVENT_STATE_CHANGED
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import entity_registry as er
+
+from custom_components.phc_control.const import DOMAIN, USAGE_SAVE_DELAY
+
+from .simulator import SimulatedSTM
+
+OUTPUT_LIGHT = "light.phc_output_0_light_0"
+OUTPUT_ON_TIME = "sensor.phc_output_0_light_0_on_time"
+DIMMER_ON_TIME = "sensor.phc_dimmer_0_dimmer_0_on_time"
+
+
+async def test_unique_ids(
+    hass: HomeAssistant, init_integration: MockConfigEntry
+) -> None:
+    """Output and dimmer channels with the same address get their own sensors."""
+    registry = er.async_get(hass)
+    output = registry.async_get(OUTPUT_ON_TIME)
+    dimmer = registry.async_get(DIMMER_ON_TIME)
+
+    assert output.unique_id == "output 0 0 on_time"
+    assert dimmer.unique_id == "dimmer 0 0 on_time"
+    # 4 output modules with 8 channels and 2 sensors, 2 dimmers with 2 and 3
+    sensors = er.async_entries_for_config_entry(registry, init_integration.entry_id)
+    assert len([entry for entry in sensors if entry.domain == "sensor"]) == 76
+
+
+async def test_usage_saved(
+    hass: HomeAssistant,
+    freezer: FrozenDateTimeFactory,
+    hass_storage: dict[str, Any],
+    init_integration: MockConfigEntry,
+) -> None:
+    """Changed usage statistics are written after USAGE_SAVE_DELAY."""
+    key = f"{DOMAIN}.{init_integration.entry_id}.output_usage"
+    await hass.services.async_call(
+        "light", "turn_on", {ATTR_ENTITY_ID: OUTPUT_LIGHT}, blocking=True
+    )
+    await hass.async_block_till_done()
+    assert key not in hass_storage
+
+    freezer.tick(USAGE_SAVE_DELAY + timedelta(seconds=1))
+    async_fire_time_changed(hass)
+    await hass.async_block_till_done()
+
+    # Switched on, then off again by the simulated status
+    assert hass_storage[key]["data"]["0.0"][1] > 0
+
+
+async def test_usage_restored(
+    hass: HomeAssistant,
+    config_entry: MockConfigEntry,
+    hass_storage: dict[str, Any],
+    mock_gateway: SimulatedSTM,
+) -> None:
+    """The totals continue from the stored values after a restart."""
+    key = f"{DOMAIN}.{config_entry.entry_id}.output_usage"
+    hass_storage[key] = {
+        "version": 1,
+        "minor_version": 1,
+        "key": key,
+        "data": {"0.0": [5400.0, 3, 5400.0]},
+    }
+
+    assert await hass.config_entries.async_setup(config_entry.entry_id)
+    await hass.async_block_till_done()
+
+    assert float(hass.states.get(OUTPUT_ON_TIME).state) == 1.5
+    assert hass.states.get("sensor.phc_output_0_light_0_switch_count").state == "3"
+
+    assert await hass.config_entries.async_unload(config_entry.entry_id)
+    await hass.async_block_till_done()
+    assert hass_storage[key]["data"]["0.0"] == [5400.0, 3, 5400.0]
+
+
+async def test_only_changed_channel_written(
+    hass: HomeAssistant, init_integration: MockConfigEntry
+) -> None:
+    """Switching a channel only writes the usage sensors of that channel."""
+    changed = []
+    hass.bus.async_listen(
+        EVENT_STATE_CHANGED,
+        lambda event: changed.append(event.data["entity_id"]),
+    )
+
+    await hass.services.async_call(
+        "light", "turn_on", {ATTR_ENTITY_ID: OUTPUT_LIGHT}, blocking=True
+    )
+    await hass.async_block_till_done()
+
+    sensors = sorted(entity_id for entity_id in changed if entity_id[:7] == "sensor.")
+    assert sensors == [OUTPUT_ON_TIME, "sensor.phc_output_0_light_0_switch_count"]
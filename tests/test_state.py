@@ -0,0 +1,64 @@
+"""Tests for the copy-on-write state store."""
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from custom_components.phc_control.state import PHCStateStore
+from custom_components.phc_control.stm.const import OutputState
+
+
+def test_snapshots_are_immutable() -> None:
+    """Published snapshots never change."""
+    store = PHCStateStore()
+    store.merge({1: OutputState(states=[False] * 8)}, since=0)
+    snapshot = store.snapshot
+
+    store.set_channel(1, 0, True)
+
+    assert snapshot[1].states[0] is False
+    assert store.snapshot[1].states[0] is True
+    with pytest.raises(TypeError):
+        store.snapshot[1] = OutputState(states=[])
+
+
+def test_set_unknown_module() -> None:
+    """Channels of modules that were never polled are ignored."""
+    store = PHCStateStore()
+    version = store.set_channel(1, 0, True)
+
+    assert version == store.version
+    assert 1 not in store.snapshot
+
+
+def test_merge_keeps_newer_writes() -> None:
+    """A poll requested before a write does not undo it."""
+    store = PHCStateStore()
+    store.merge({1: OutputState(states=[False] * 8)}, since=0)
+
+    since = store.version
+    store.set_channel(1, 2, True)
+    store.merge({1: OutputState(states=[False] * 8)}, since=since)
+    assert store.snapshot[1].states[2] is True
+
+    # A poll requested after the write wins
+    store.merge({1: OutputState(states=[False] * 8)}, since=store.version)
+    assert store.snapshot[1].states[2] is False
+
+
+def test_concurrent_writes_and_merges() -> None:
+    """Writes from many threads survive merges of older polls."""
+    store = PHCStateStore()
+    store.merge({addr: OutputState(states=[False] * 8) for addr in range(8)}, 0)
+    since = store.version
+
+    def write(addr: int) -> None:
+        for cha in range(8):
+            store.set_channel(addr, cha, True)
+            store.merge({addr: OutputState(states=[False] * 8)}, since)
+
+    with ThreadPoolExecutor(8) as executor:
+        list(executor.map(write, range(8)))
+
+    assert all(all(state.states) for state in store.snapshot.values())
@@ -0,0 +1,141 @@
+"""Round trip tests for the XML-RPC codec."""
+from __future__ import annotations
+
+import math
+import xml.etree.ElementTree as ET
+
+from hypothesis import given, strategies as st
+import pytest
+
+from custom_components.phc_control.stm.telegram import (
+    MAX_INT,
+    MIN_INT,
+    TelegramFault,
+    decode_call,
+    decode_response,
+    decode_value,
+    encode_call,
+    encode_params,
+    encode_telegram,
+    encode_value,
+)
+
+# Characters XML 1.0 can carry: no control characters besides tab, newline
+# and carriage return, no surrogates, no U+FFFE and U+FFFF
+xml_text = st.text(
+    st.characters(
+        blacklist_categories=("Cs",), blacklist_characters="\ufffe\uffff"
+    ).filter(lambda char: char in "\t\n\r" or char >= " ")
+)
+
+scalars = (
+    st.booleans()
+    | st.integers(MIN_INT, MAX_INT)
+    | st.floats(allow_nan=False, allow_infinity=False)
+    | xml_text
+    | st.binary()
+)
+values = st.recursive(
+    scalars,
+    lambda children: st.lists(children, max_size=4)
+    | st.dictionaries(xml_text, children, max_size=4),
+    max_leaves=20,
+)
+
+
+def round_trip(value):
+    """Encode and decode a single value."""
+    return decode_value(ET.fromstring(encode_value(value)))
+
+
+def response(params) -> str:
+    """Return a methodResponse carrying params."""
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?><methodResponse><params>'
+        f"{encode_params(params)}</params></methodResponse>"
+    )
+
+
+@given(values)
+def test_value_round_trip(value) -> None:
+    """Every representable value decodes to itself."""
+    assert round_trip(value) == value
+
+
+def test_value_types() -> None:
+    """Types without an XML-RPC counterpart decode to their closest type."""
+    assert round_trip((1, 2)) == [1, 2]
+    assert round_trip(bytearray(b"\x00\x01")) == b"\x00\x01"
+    assert round_trip({1: "a"}) == {"1": "a"}
+    assert round_trip(True) is True
+    assert round_trip(-0.0) == 0.0 and math.copysign(1, round_trip(-0.0)) == -1
+    assert round_trip("a\r\nb <&> ]]>") == "a\r\nb <&> ]]>"
+
+
+@pytest.mark.parametrize("value", [MAX_INT + 1, MIN_INT - 1, 2**40])
+def test_int_out_of_range(value: int) -> None:
+    """Integers that do not fit <i4> are rejected."""
+    with pytest.raises(OverflowError):
+        encode_value(value)
+
+
+@pytest.mark.parametrize(
+    "value", [math.nan, math.inf, -math.inf, "a\x00b", "\x1b", {"\x00": 1}]
+)
+def test_unrepresentable_values(value) -> None:
+    """NaN, infinity and characters XML cannot carry are rejected."""
+    with pytest.raises(ValueError):
+        encode_value(value)
+
+
+def test_unsupported_type() -> None:
+    """Other types are rejected."""
+    with pytest.raises(TypeError):
+        encode_value(None)
+
+
+@given(xml_text.filter(lambda name: name.isidentifier()), st.lists(values, max_size=4))
+def test_call_round_trip(method: str, params: list) -> None:
+    """A methodCall decodes to its method and parameters."""
+    assert decode_call(encode_call(method, params)) == (method, params)
+
+
+@given(
+    st.integers(0, 0xFF),
+    st.integers(0, 7),
+    st.integers(0, 31),
+    st.lists(st.integers(0, 0xFF), max_size=4),
+)
+def test_telegram_round_trip(address, channel, command, args) -> None:
+    """A telegram carries the address, the channel/command byte and the data."""
+    assert decode_call(encode_telegram(address, channel, command, *args)) == (
+        "service.stm.sendTelegram",
+        [0, address, channel * 32 + command, *args],
+    )
+
+
+@given(st.lists(values, max_size=4))
+def test_response_round_trip(params: list) -> None:
+    """A methodResponse decodes to its parameters."""
+    assert decode_response(response(params)) == params
+
+
+@given(st.integers(MIN_INT, MAX_INT), xml_text)
+def test_fault(code: int, message: str) -> None:
+    """A fault response raises TelegramFault with its code and message."""
+    fault = encode_value({"faultCode": code, "faultString": message})
+    with pytest.raises(TelegramFault) as err:
+        decode_response(
+            '<?xml version="1.0" encoding="UTF-8"?><methodResponse><fault>'
+            f"{fault}</fault></methodResponse>"
+        )
+    assert err.value.code == code
+    assert err.value.message == message
+
+
+def test_untyped_value() -> None:
+    """A <value> without a type element is a string."""
+    text = response([]).replace(
+        "<params></params>", "<params><param><value>text</value></param></params>"
+    )
+    assert decode_response(text) == ["text"]
@@ -0,0 +1,78 @@
+"""Tests for the usage accumulator."""
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+import pytest
+
+from custom_components.phc_control import usage
+from custom_components.phc_control.usage import UsageAccumulator
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> SimpleNamespace:
+    """Replace the monotonic clock of the accumulator."""
+    clock = SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(
+        usage, "time", SimpleNamespace(monotonic=lambda: clock.now)
+    )
+    return clock
+
+
+def _snapshot(*channels: int) -> dict[int, SimpleNamespace]:
+    return {0: SimpleNamespace(states=list(channels))}
+
+
+def test_toggles(clock: SimpleNamespace) -> None:
+    """Switch count and on time follow the crossings between off and on."""
+    accumulator = UsageAccumulator()
+    accumulator.observe(_snapshot(0, 1))
+    for _ in range(3):
+        clock.now += 10
+        accumulator.observe(_snapshot(1, 1))
+        clock.now += 5
+        accumulator.observe(_snapshot(0, 1))
+
+    assert accumulator.get(0, 0) == (15.0, 6, 15.0)
+    # On since the first observation, which is not a switch
+    assert accumulator.get(0, 1) == (45.0, 0, 45.0)
+
+    # An unchanged snapshot object is skipped
+    snapshot = _snapshot(1, 1)
+    accumulator.observe(snapshot)
+    snapshot[0].states[0] = 0
+    accumulator.observe(snapshot)
+    assert accumulator.get(0, 0)[1] == 7
+
+
+def test_brightness_weighting(clock: SimpleNamespace) -> None:
+    """Dimmer time is weighted by the brightness, a change is no switch."""
+    accumulator = UsageAccumulator(scale=255)
+    accumulator.observe(_snapshot(0))
+    accumulator.observe(_snapshot(255))
+    clock.now += 10
+    accumulator.observe(_snapshot(51))
+    clock.now += 10
+    accumulator.observe(_snapshot(0))
+    clock.now += 10
+
+    on_seconds, toggles, weighted_seconds = accumulator.get(0, 0)
+    assert on_seconds == 20
+    assert toggles == 2
+    assert weighted_seconds == pytest.approx(12)
+
+
+def test_restore_then_observe(clock: SimpleNamespace) -> None:
+    """Restored totals continue, the first observation counts no switch."""
+    accumulator = UsageAccumulator()
+    accumulator.restore({"0.0": [100.0, 4, 100.0]})
+    assert accumulator.get(0, 0) == (100.0, 4, 100.0)
+
+    clock.now += 50
+    accumulator.observe(_snapshot(1))
+    assert accumulator.get(0, 0) == (100.0, 4, 100.0)
+
+    clock.now += 10
+    accumulator.observe(_snapshot(0))
+    assert accumulator.get(0, 0) == (110.0, 5, 110.0)
+    assert accumulator.as_dict() == {"0.0": [110.0, 5, 110.0]}